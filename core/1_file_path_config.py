@@ -1,9 +1,3 @@
-import geopandas as gpd
-import networkx as nx
-from shapely.geometry import LineString, MultiLineString, Point
-from collections import deque
-import pandas as pd
-
 # --- Configuration: SET YOUR FILE PATHS AND COLUMN NAMES HERE ---
 ROAD_LINES_FILE = "ROAD_NETWORK_finale.geojson"
 ROAD_INTERSECTIONS_FILE = "all_intersections_pro.geojson"
@@ -13,3 +7,14 @@ QGIS_NAME_COLUMN = 'Name'
 QGIS_UNIQUE_ID_COLUMN = 'id' # IMPORTANT: Set to 'id' (lowercase) to match QGIS export
 
 COORD_PRECISION = 6
+
+# Features per chunk when streaming the GeoJSON layers; caps peak memory on very large files
+READ_CHUNK_SIZE = 100_000
+
+# The built graph is pickled here (next to the GeoJSON files) and reused until a source file or setting changes.
+# Set to None to always rebuild. Bump GRAPH_CACHE_VERSION whenever the cached graph's layout changes.
+GRAPH_CACHE_FILE = "graph_cache.pkl"
+GRAPH_CACHE_VERSION = 3
+
+# Heavy geospatial libraries (geopandas, shapely, pandas) are imported
+# inside the functions that use them, so startup and early exits stay cheap.
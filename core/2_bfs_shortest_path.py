@@ -1,25 +1,252 @@
-# --- Helper Function: Breadth-First Search (BFS) Algorithm ---
-def bfs_shortest_path(graph, start_node, end_node):
+import sys
+from collections import deque
+import numpy as np
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    # Numba is optional: without it the @njit kernels still work, just as plain (slower) Python
+    NUMBA_AVAILABLE = False
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+    prange = range
+
+# --- Helper Function: Rebuild a Path from Parent Pointers ---
+def reconstruct_path(parent, end_node):
+    """
+    Walks the parent pointers back from end_node and reverses the result.
+    Returns a list of NetworkX node IDs from the search root to end_node.
+    """
+    path = []
+    current_node = end_node
+    while current_node is not None:
+        path.append(current_node)
+        current_node = parent[current_node]
+    return path[::-1]
+
+# --- Helper Function: Plain Adjacency Lists for BFS ---
+def get_adj_list(graph):
+    """
+    Returns the graph's adjacency as a plain {node: [neighbors]} dict, built once
+    from the CSR arrays and stored in graph['adj_list']. Only get_pred_tree's
+    pure-Python fallback needs it, so it is never built when Numba or SciPy is used.
+    """
+    adj = graph.get('adj_list')
+    if adj is None:
+        indptr, indices = get_csr_adjacency(graph)
+        indptr, indices = indptr.tolist(), indices.tolist()
+        adj = graph['adj_list'] = {node: indices[indptr[node]:indptr[node + 1]] for node in range(graph['num_nodes'])}
+    return adj
+
+# --- Helper Function: Single-Source BFS Predecessor Tree ---
+def get_pred_tree(graph, source_node):
+    """
+    Runs one full BFS from source_node and returns its predecessor tree
+    ({node: parent}, with the source mapped to None). Trees are memoized per
+    source in graph['pred_cache'], so every later query from the same
+    source is just a parent backtrace with no graph traversal.
+    The traversal runs in C via SciPy when it is installed, over the CSR arrays
+    from get_csr_adjacency, and falls back to a pure-Python BFS otherwise.
+    """
+    pred_cache = graph.setdefault('pred_cache', {})
+    if source_node in pred_cache:
+        return pred_cache[source_node]
+
+    try:
+        from scipy.sparse import csr_matrix
+        from scipy.sparse.csgraph import breadth_first_order
+    except ImportError:
+        # SciPy is optional: without it the tree is grown in pure Python below
+        csr_matrix = None
+
+    if csr_matrix is not None:
+        indptr, indices = get_csr_adjacency(graph)
+        n = len(indptr) - 1
+        adjacency_matrix = csr_matrix((np.ones(len(indices), dtype=np.int8), indices, indptr), shape=(n, n))
+        node_order, predecessors = breadth_first_order(adjacency_matrix, source_node, directed=True, return_predecessors=True)
+        # node_order lists every reached node; the source's predecessor entry is a placeholder
+        parent = dict(zip(node_order.tolist(), predecessors[node_order].tolist()))
+        parent[source_node] = None
+    else:
+        adj = get_adj_list(graph)
+        queue = deque([source_node])
+        parent = {source_node: None}
+        while queue:
+            current_node = queue.popleft()
+            for neighbor in adj[current_node]:
+                if neighbor not in parent:
+                    parent[neighbor] = current_node
+                    queue.append(neighbor)
+
+    pred_cache[source_node] = parent
+    return parent
+
+
+# --- Helper Function: Compressed Sparse Row (CSR) Adjacency ---
+def get_csr_adjacency(graph):
     """
-    Finds the shortest path in an unweighted graph using BFS.
-    Returns a list of NetworkX node IDs forming the path, or None if no path.
+    Returns the graph's adjacency in CSR form as two int32 arrays, built once from
+    the edge arrays and stored in graph['csr']: the neighbors of node u are
+    indices[indptr[u]:indptr[u + 1]]. Each edge is listed under both of its end
+    nodes, and every node's neighbors keep the order their edges were added in.
+    Returns:
+        tuple: (indptr, indices)
+    """
+    csr = graph.get('csr')
+    if csr is None:
+        n = graph['num_nodes']
+        # Interleave both directions edge by edge, then a stable sort groups them by source node
+        sources = np.column_stack([graph['edge_src'], graph['edge_dst']]).ravel()
+        targets = np.column_stack([graph['edge_dst'], graph['edge_src']]).ravel()
+        indptr = np.zeros(n + 1, dtype=np.int32)
+        np.cumsum(np.bincount(sources, minlength=n), out=indptr[1:])
+        indices = targets[np.argsort(sources, kind='stable')].astype(np.int32)
+        csr = graph['csr'] = (indptr, indices)
+    return csr
+
+# --- Helper Function: Reusable BFS Scratch Buffers ---
+def get_bfs_scratch(graph):
+    """
+    Returns the (state, queue) scratch buffers for bidirectional_bfs_csr_reusing,
+    allocated once and stored in graph['bfs_scratch'], so repeated interactive
+    queries do not allocate them per search. Each search leaves every parent
+    entry -1 again, ready for the next query. The buffers must not be shared
+    between threads; bfs_many allocates its own.
+    Returns:
+        tuple: (state, queue)
+    """
+    scratch = graph.get('bfs_scratch')
+    if scratch is None:
+        n = graph['num_nodes']
+        scratch = graph['bfs_scratch'] = (np.full((2, n, 2), -1, dtype=np.int64), np.empty((2, n), dtype=np.int64))
+    return scratch
+
+# --- Helper Function: Bidirectional BFS on Caller-Owned Scratch Buffers ---
+@njit(cache=True, nogil=True)
+def bidirectional_bfs_csr_reusing(indptr, indices, start_node, end_node, state, queue):
+    """
+    Finds the shortest path over the CSR arrays from get_csr_adjacency with a
+    compiled bidirectional BFS: one search grows from each end, the smaller
+    frontier is always expanded by a full level, and the two parent chains are
+    stitched together where the searches meet. The scratch buffers belong to
+    the caller so they can be reused across queries: state is a (2, n, 2) int64
+    array filled with -1 holding each node's [parent, depth] side by side, and
+    queue a (2, n) int64 array. Row 0 of each belongs to the search from
+    start_node and row 1 to the search from end_node. The stored depths size
+    the path directly, and only the entries this search touched are reset to
+    -1 before returning, so a query costs time in proportion to the nodes it visits.
+    Returns:
+        numpy.ndarray: The path as int64 node IDs, or an empty array if no path.
     """
     if start_node == end_node:
-        return [start_node]
-    if start_node not in graph or end_node not in graph:
-        return None
+        return np.full(1, start_node, dtype=np.int64)
+
+    level_start = np.zeros(2, dtype=np.int64)
+    level_end = np.ones(2, dtype=np.int64)
+    state[0, start_node, 0] = start_node
+    state[0, start_node, 1] = 0
+    state[1, end_node, 0] = end_node
+    state[1, end_node, 1] = 0
+    queue[0, 0] = start_node
+    queue[1, 0] = end_node
+    meeting_node = -1
+
+    while meeting_node == -1 and level_start[0] < level_end[0] and level_start[1] < level_end[1]:
+        # Expand whichever side currently has the smaller frontier
+        side = 0 if level_end[0] - level_start[0] <= level_end[1] - level_start[1] else 1
+        other = 1 - side
+        tail = level_end[side]
+        for q in range(level_start[side], level_end[side]):
+            current_node = queue[side, q]
+            for k in range(indptr[current_node], indptr[current_node + 1]):
+                neighbor = indices[k]
+                if state[side, neighbor, 0] == -1:
+                    state[side, neighbor, 0] = current_node
+                    state[side, neighbor, 1] = state[side, current_node, 1] + 1
+                    queue[side, tail] = neighbor
+                    tail += 1
+                if state[other, neighbor, 0] != -1: # The two searches have met
+                    meeting_node = neighbor
+                    break
+            if meeting_node != -1:
+                break
+        level_start[side] = level_end[side]
+        level_end[side] = tail
 
-    queue = deque([(start_node, [start_node])])
-    visited = {start_node}
+    if meeting_node == -1:
+        path = np.empty(0, dtype=np.int64)
+    else:
+        # Write start..meeting_node back to front and meeting_node..end front to back
+        forward_length = state[0, meeting_node, 1] + 1
+        path = np.empty(forward_length + state[1, meeting_node, 1], dtype=np.int64)
+        current_node = meeting_node
+        for i in range(forward_length - 1, -1, -1):
+            path[i] = current_node
+            current_node = state[0, current_node, 0]
+        current_node = meeting_node
+        for i in range(forward_length, len(path)):
+            current_node = state[1, current_node, 0]
+            path[i] = current_node
 
-    while queue:
-        current_node, path = queue.popleft()
+    # Every node either side visited is still in its queue, so only those entries need clearing
+    for side in range(2):
+        for q in range(level_end[side]):
+            state[side, queue[side, q], 0] = -1
+    return path
+
+# --- Helper Function: Many Shortest-Path Queries in Parallel ---
+@njit(cache=True, nogil=True, parallel=True)
+def bfs_many(indptr, indices, starts, ends):
+    """
+    Answers many shortest-path queries (starts[i] to ends[i]) at once over the
+    CSR arrays, spreading blocks of queries across all cores with prange; each
+    block reuses one set of scratch buffers (see bidirectional_bfs_csr_reusing).
+    Returns:
+        tuple: (offsets, nodes) as int64 arrays; query i's path is
+               nodes[offsets[i]:offsets[i + 1]], empty if there is no path.
+    """
+    n = len(indptr) - 1
+    num_queries = len(starts)
+    queries_per_block = 64 # Queries sharing one set of scratch buffers
+    # Each block stores its paths in one row of block_paths, sized for this average path length (in nodes);
+    # queries whose paths overflow the row are searched again in the copy pass
+    average_path_nodes = 64
+    num_blocks = (num_queries + queries_per_block - 1) // queries_per_block
+    row_capacity = queries_per_block * min(n, average_path_nodes)
 
-        if current_node == end_node:
-            return path
+    path_lengths = np.zeros(num_queries, dtype=np.int64)
+    stored = np.zeros(num_queries, dtype=np.bool_)
+    block_paths = np.empty((num_blocks, row_capacity), dtype=np.int64)
+    for block in prange(num_blocks):
+        state = np.full((2, n, 2), -1, dtype=np.int64)
+        queue = np.empty((2, n), dtype=np.int64)
+        row_used = 0
+        for i in range(block * queries_per_block, min((block + 1) * queries_per_block, num_queries)):
+            path = bidirectional_bfs_csr_reusing(indptr, indices, starts[i], ends[i], state, queue)
+            path_lengths[i] = len(path)
+            if row_used + len(path) <= row_capacity:
+                block_paths[block, row_used:row_used + len(path)] = path
+                row_used += len(path)
+                stored[i] = True
 
-        for neighbor in graph.neighbors(current_node):
-            if neighbor not in visited:
-                visited.add(neighbor)
-                queue.append((neighbor, path + [neighbor]))
-    return None
\ No newline at end of file
+    offsets = np.zeros(num_queries + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(path_lengths)
+    nodes = np.empty(offsets[-1], dtype=np.int64)
+    for block in prange(num_blocks):
+        first_query = block * queries_per_block
+        last_query = min(first_query + queries_per_block, num_queries)
+        # Scratch buffers are only needed if some of this block's paths overflowed its row
+        scratch_size = 0 if stored[first_query:last_query].all() else n
+        state = np.full((2, scratch_size, 2), -1, dtype=np.int64)
+        queue = np.empty((2, scratch_size), dtype=np.int64)
+        row_used = 0
+        for i in range(first_query, last_query):
+            if stored[i]:
+                nodes[offsets[i]:offsets[i + 1]] = block_paths[block, row_used:row_used + path_lengths[i]]
+                row_used += path_lengths[i]
+            else:
+                nodes[offsets[i]:offsets[i + 1]] = bidirectional_bfs_csr_reusing(indptr, indices, starts[i], ends[i], state, queue)
+    return offsets, nodes
\ No newline at end of file
@@ -1,26 +1,21 @@
 # --- Helper Function: Find NetworkX ID from QGIS ID or Name ---
-# MODIFICATION: Changed how search_by is handled within this function
-def find_networkx_id(identifier, details_dict, search_by='id'): # Default search_by to 'id'
+def find_networkx_id(identifier, id_index, name_index, search_by='id'): # Default search_by to 'id'
     """
     Finds the NetworkX node ID given a QGIS ID (from 'id' column) or Name.
     Args:
         identifier (str): The QGIS 'id' or 'Name' to search for.
-        details_dict (dict): The networkx_id_to_details dictionary.
-        search_by (str): 'id' or 'name' to specify which attribute to search.
-                         'id' directly corresponds to the 'qgis_id' key in details_dict,
-                         which stores values from QGIS_UNIQUE_ID_COLUMN.
+        id_index (dict): QGIS ID -> NetworkX ID, as returned by prepare_graph_nodes.
+                         Its keys are the values from QGIS_UNIQUE_ID_COLUMN.
+        name_index (dict): Lower-cased name -> NetworkX ID, as returned by prepare_graph_nodes.
+        search_by (str): 'id' or 'name' to specify which index to search.
     Returns:
         int: The corresponding NetworkX node ID, or None if not found.
     """
     stripped_identifier = str(identifier).strip()
-    for networkx_id, details in details_dict.items():
-        # The 'qgis_id' key in details_dict stores values from QGIS_UNIQUE_ID_COLUMN ('id')
-        if search_by == 'id': # Directly check for 'id' from user input
-            # Case-sensitive matching for QGIS_ID (from the 'id' column)
-            if details['qgis_id'] == stripped_identifier:
-                return networkx_id
-        elif search_by == 'name':
-            # Name matching remains case-insensitive
-            if details['name'].lower() == stripped_identifier.lower():
-                return networkx_id
+    if search_by == 'id':
+        # Case-sensitive matching for QGIS_ID (from the 'id' column)
+        return id_index.get(stripped_identifier)
+    elif search_by == 'name':
+        # Name matching remains case-insensitive
+        return name_index.get(stripped_identifier.lower())
     return None
\ No newline at end of file
@@ -1,16 +1,149 @@
+# --- Helper Function: Read One GeoJSON Layer ---
+def read_geojson(path, columns):
+    """
+    Reads a GeoJSON file through pyogrio with Arrow, which hands GDAL's columns
+    over in one batch instead of building Python objects feature by feature.
+    Arrow reads need pyogrio, pyarrow and GDAL >= 3.6; if that fails the file is
+    read again with geopandas' default engine, so a genuinely bad path still raises.
+    Returns:
+        geopandas.GeoDataFrame: The geometry plus whichever of `columns` exist.
+    """
+    import geopandas as gpd
+
+    try:
+        return gpd.read_file(path, engine="pyogrio", use_arrow=True, columns=columns)
+    except Exception:
+        return gpd.read_file(path, columns=columns)
+
+# --- Helper Function: Stream One GeoJSON Layer in Chunks ---
+def iter_geojson_chunks(path, columns, chunk_size):
+    """
+    Yields a GeoJSON layer as GeoDataFrames of at most chunk_size features,
+    streamed through pyogrio's Arrow reader so only one chunk is in memory at a
+    time. If streaming is unavailable or its first batch fails, the whole layer
+    is yielded as a single chunk from read_geojson.
+    """
+    import geopandas as gpd
+    import shapely
+
+    try:
+        import pyarrow # noqa: F401 - open_arrow(use_pyarrow=True) needs it
+        from pyogrio.raw import open_arrow
+    except ImportError:
+        yield read_geojson(path, columns)
+        return
+
+    streaming = False
+    try:
+        with open_arrow(path, columns=columns, batch_size=chunk_size, use_pyarrow=True) as (meta, batch_reader):
+            # GDAL names the WKB column 'wkb_geometry' when the layer gives it no name
+            geometry_name = meta['geometry_name'] or 'wkb_geometry'
+            for batch in batch_reader:
+                chunk_df = batch.to_pandas()
+                geometries = shapely.from_wkb(chunk_df.pop(geometry_name).to_numpy())
+                chunk_gdf = gpd.GeoDataFrame(chunk_df, geometry=geometries, crs=meta['crs'])
+                streaming = True
+                yield chunk_gdf
+    except Exception:
+        # Once chunks have been handed out, a failure cannot be retried without duplicating them
+        if streaming:
+            raise
+        yield read_geojson(path, columns)
+
+# --- Helper Function: Open a Layer Stream and Read Its First Chunk ---
+def open_geojson_chunks(path, columns, chunk_size):
+    """
+    Starts iter_geojson_chunks and pulls the first chunk right away, so a
+    missing or unreadable file raises here rather than later, mid-pipeline.
+    Returns:
+        iterator: Every chunk of the layer, the first one included.
+    """
+    from itertools import chain
+
+    chunks = iter_geojson_chunks(path, columns, chunk_size)
+    first_chunk = next(chunks, None)
+    return chunks if first_chunk is None else chain([first_chunk], chunks)
+
+# --- Helper Function: Fingerprint the Graph's Inputs ---
+def graph_cache_key(source_paths, *settings):
+    """
+    Describes everything the built graph depends on: the size and modification
+    time of each source file, plus any settings (columns, precision, cache version).
+    Returns:
+        tuple: The cache key, or None if a source file cannot be read.
+    """
+    import os
+
+    try:
+        file_stats = tuple((path, os.stat(path).st_size, os.stat(path).st_mtime_ns) for path in source_paths)
+    except OSError:
+        return None
+    return file_stats + settings
+
+# --- Helper Function: Load a Previously Built Graph ---
+def load_graph_cache(cache_path, cache_key):
+    """
+    Loads the data pickled by save_graph_cache, so a run can skip reading the
+    GeoJSON files and rebuilding the graph entirely. Anything unreadable, or
+    written for a different cache key, counts as a miss.
+    Returns:
+        The cached data, or None on a cache miss.
+    """
+    import pickle
+
+    if cache_path is None or cache_key is None:
+        return None
+    try:
+        with open(cache_path, 'rb') as f:
+            cached_key, cached_data = pickle.load(f)
+    except Exception:
+        return None
+    return cached_data if cached_key == cache_key else None
+
+# --- Helper Function: Save the Built Graph for Later Runs ---
+def save_graph_cache(cache_path, cache_key, data):
+    """
+    Pickles data together with its cache key. The file is written under a
+    temporary name and then swapped in, so an interrupted run never leaves a
+    half-written cache behind. Failing to write the cache is only a warning.
+    """
+    import os
+    import pickle
+
+    if cache_path is None or cache_key is None:
+        return
+    temp_path = f"{cache_path}.tmp"
+    try:
+        with open(temp_path, 'wb') as f:
+            pickle.dump((cache_key, data), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, cache_path)
+    except Exception as e:
+        print(f"Warning: Could not write graph cache '{cache_path}': {e}")
+
 # --- Main Functions for Geospatial Graph Processing ---
 
-def load_geospatial_data(road_lines_path, intersections_path, buildings_path):
+def load_geospatial_data(road_lines_path, intersections_path, buildings_path, name_col, id_col, chunk_size=None):
     """
     Loads geospatial data from specified GeoJSON files.
+    Files are read with pyogrio and Arrow (see read_geojson), and only the
+    geometry plus the columns the graph actually uses (road 'description',
+    node name_col and id_col) are parsed; any missing from a file are skipped.
+    With a chunk_size, each layer is instead streamed as an iterator of
+    GeoDataFrames of at most that many features (see iter_geojson_chunks), which
+    prepare_graph_nodes and build_network_graph consume one chunk at a time.
     Returns:
         tuple: (road_lines_gdf, road_intersections_gdf, main_buildings_gdf)
     """
     print("Loading geospatial data...")
     try:
-        road_lines_gdf = gpd.read_file(road_lines_path)
-        road_intersections_gdf = gpd.read_file(intersections_path)
-        main_buildings_gdf = gpd.read_file(buildings_path)
+        if chunk_size is None:
+            road_lines_gdf = read_geojson(road_lines_path, ['description'])
+            road_intersections_gdf = read_geojson(intersections_path, [name_col, id_col])
+            main_buildings_gdf = read_geojson(buildings_path, [name_col, id_col])
+        else:
+            road_lines_gdf = open_geojson_chunks(road_lines_path, ['description'], chunk_size)
+            road_intersections_gdf = open_geojson_chunks(intersections_path, [name_col, id_col], chunk_size)
+            main_buildings_gdf = open_geojson_chunks(buildings_path, [name_col, id_col], chunk_size)
         print("Geospatial data loaded successfully.")
         return road_lines_gdf, road_intersections_gdf, main_buildings_gdf
     except Exception as e:
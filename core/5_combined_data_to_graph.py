@@ -1,57 +1,173 @@
+# --- Helper Function: Quantize Coordinates for Precision Matching ---
+def quantize_coords(xs, ys, precision):
+    """
+    Scales whole arrays of coordinates by 10**precision and rounds them to the
+    nearest integer, so coordinates that agree to `precision` decimals compare equal.
+    Returns:
+        tuple: (x_ints, y_ints) as int64 NumPy arrays.
+    """
+    scale = 10 ** precision
+    x_scaled = np.multiply(xs, scale)
+    y_scaled = np.multiply(ys, scale)
+    # np.rint rounds half to even exactly like np.round, minus its decimals handling, and works in place
+    np.rint(x_scaled, out=x_scaled)
+    np.rint(y_scaled, out=y_scaled)
+    return x_scaled.astype(np.int64), y_scaled.astype(np.int64)
+
+# Wide coordinate keys: one (x, y) record per point, for coordinates too large to pack
+COORD_PAIR_DTYPE = np.dtype([('x', np.int64), ('y', np.int64)])
+
+# --- Helper Function: Pack Quantized Coordinates into One Integer Key ---
+def pack_coord_keys(x_ints, y_ints):
+    """
+    Packs quantized x/y coordinates into a single int64 key per point, x in the
+    high 32 bits and y in the low 32 bits. Plain integers hash and compare far
+    faster than (x, y) tuples. Packing needs each axis to fit in 32 bits once
+    scaled, which holds for longitude/latitude at COORD_PRECISION = 6; when any
+    value does not (e.g. projected coordinates in metres), distinct points could
+    collide, so the keys are built as COORD_PAIR_DTYPE records instead.
+    Returns:
+        numpy.ndarray: one key per point, int64 or COORD_PAIR_DTYPE.
+    """
+    int32_range = np.iinfo(np.int32)
+    if len(x_ints) and (min(x_ints.min(), y_ints.min()) < int32_range.min or max(x_ints.max(), y_ints.max()) > int32_range.max):
+        return coord_pair_keys(x_ints, y_ints)
+    return (x_ints << 32) | (y_ints & 0xFFFFFFFF)
+
+# --- Helper Function: Wide (x, y) Coordinate Keys ---
+def coord_pair_keys(x_ints, y_ints):
+    """
+    Builds one COORD_PAIR_DTYPE record per point. These keys sort, deduplicate
+    and compare with np.unique/np.isin like packed keys, at any coordinate size.
+    Returns:
+        numpy.ndarray: COORD_PAIR_DTYPE keys, one per point.
+    """
+    keys = np.empty(len(x_ints), dtype=COORD_PAIR_DTYPE)
+    keys['x'] = x_ints
+    keys['y'] = y_ints
+    return keys
+
+# --- Helper Function: Widen Packed Coordinate Keys ---
+def widen_coord_keys(keys):
+    """
+    Converts packed int64 keys from pack_coord_keys back into COORD_PAIR_DTYPE
+    records, so they can be compared with wide keys. Wide keys pass through.
+    Returns:
+        numpy.ndarray: COORD_PAIR_DTYPE keys.
+    """
+    if keys.dtype == COORD_PAIR_DTYPE:
+        return keys
+    # The low 32 bits hold y as two's complement; sign-extend it back to int64
+    y_ints = ((keys & 0xFFFFFFFF) ^ 0x80000000) - 0x80000000
+    return coord_pair_keys(keys >> 32, y_ints)
+
+# --- Helper Function: Column Values as Stripped Strings ---
+def stripped_column_values(gdf, column):
+    """
+    Returns the values of a GeoDataFrame column as stripped strings in one
+    vectorized pass, with None wherever the value (or the whole column) is missing.
+    """
+    if column not in gdf.columns:
+        return np.full(len(gdf), None, dtype=object)
+    values = gdf[column]
+    return np.where(values.isna().to_numpy(), None, values.astype(str).str.strip().to_numpy())
+
 def prepare_graph_nodes(intersections_gdf, buildings_gdf, name_col, id_col, precision):
     """
     Combines intersection and building GDFs and prepares node mappings for NetworkX.
+    Each layer may be a single GeoDataFrame or an iterable of GeoDataFrame chunks
+    (see load_geospatial_data); each chunk is deduplicated as it arrives, and one
+    final pass over the kept keys drops locations repeated across chunks.
     Returns:
-        tuple: (node_coords_to_networkx_id, networkx_id_to_details)
+        tuple: (networkx_id_to_details, id_index, name_index, layer_sizes)
+               networkx_id_to_details has one entry per unique node, keyed by NetworkX ID.
+               id_index maps each QGIS ID and name_index each lower-cased name
+               to its NetworkX ID, for O(1) lookups in find_networkx_id.
+               layer_sizes is (intersection count, building count) as loaded.
     """
+    import pandas as pd
+    import shapely
+
     print("Combining all potential graph nodes (intersections + buildings)...")
 
-    # Ensure CRSs match before concatenating
-    if intersections_gdf.crs != buildings_gdf.crs:
-        print(f"Warning: CRSs of road intersections ({intersections_gdf.crs}) and building layers ({buildings_gdf.crs}) differ. Reprojecting buildings to match intersections.")
-        try:
-            buildings_gdf = buildings_gdf.to_crs(intersections_gdf.crs)
-        except Exception as e:
-            print(f"Error reprojecting building layer: {e}")
-            print("Continuing without reprojecting, but CRS mismatch might cause issues.")
+    # Nodes unique within their chunk, one array per chunk, in intersections-then-buildings order
+    kept_geometries, kept_names, kept_ids, kept_keys = [], [], [], []
+    layer_sizes = []
+    reference_crs = None
+    for layer_name, layer_chunks in (("road intersections", intersections_gdf), ("building", buildings_gdf)):
+        if isinstance(layer_chunks, pd.DataFrame):
+            layer_chunks = [layer_chunks]
+        layer_size = 0
+        for chunk_index, chunk_gdf in enumerate(layer_chunks):
+            layer_size += len(chunk_gdf)
+            if reference_crs is None:
+                reference_crs = chunk_gdf.crs
+            elif chunk_gdf.crs != reference_crs:
+                # Ensure CRSs match before combining; all chunks of a layer share one CRS, so only the first reports
+                if chunk_index == 0:
+                    print(f"Warning: CRSs of road intersections ({reference_crs}) and {layer_name} layers ({chunk_gdf.crs}) differ. Reprojecting {layer_name} layer to match intersections.")
+                try:
+                    chunk_gdf = chunk_gdf.to_crs(reference_crs)
+                except Exception as e:
+                    if chunk_index == 0:
+                        print(f"Error reprojecting {layer_name} layer: {e}")
+                        print("Continuing without reprojecting, but CRS mismatch might cause issues.")
 
-    all_graph_nodes_gdf = gpd.pd.concat([
-        intersections_gdf,
-        buildings_gdf
-    ]).drop_duplicates(subset=['geometry']).reset_index(drop=True)
+            # Read every point's x/y in one vectorized call. get_coordinates skips missing geometries (and
+            # multi-part ones add rows), so if the rows no longer line up, read x and y per geometry instead
+            node_geoms = chunk_gdf.geometry.to_numpy()
+            node_coords = shapely.get_coordinates(node_geoms)
+            if len(node_coords) != len(node_geoms):
+                node_coords = np.column_stack([shapely.get_x(node_geoms), shapely.get_y(node_geoms)])
 
-    print(f"Total unique potential nodes identified in combined GeoDataFrame: {len(all_graph_nodes_gdf)}")
+            # Deduplicate on packed integer coordinate keys with plain NumPy instead of hashing shapely geometries:
+            # np.unique gives each location's first row in the chunk
+            packed_keys = pack_coord_keys(*quantize_coords(node_coords[:, 0], node_coords[:, 1], precision))
+            first_rows = np.sort(np.unique(packed_keys, return_index=True)[1])
 
-    if len(all_graph_nodes_gdf) == 0:
-        print("Error: No nodes found to build the graph. Cannot proceed.")
-        return {}, {} # Return empty mappings
+            kept_geometries.append(node_geoms[first_rows])
+            kept_names.append(stripped_column_values(chunk_gdf, name_col)[first_rows])
+            kept_ids.append(stripped_column_values(chunk_gdf, id_col)[first_rows])
+            kept_keys.append(packed_keys[first_rows])
+        layer_sizes.append(layer_size)
+    layer_sizes = tuple(layer_sizes)
 
-    node_coords_to_networkx_id = {}
-    networkx_id_to_details = {}
-    current_networkx_id = 0
+    print(f"Total potential nodes identified across all layers: {sum(layer_sizes)}")
 
-    for idx, row in all_graph_nodes_gdf.iterrows():
-        point_geom = row.geometry
-        coords_key = f"{point_geom.x:.{precision}f},{point_geom.y:.{precision}f}"
+    if sum(layer_sizes) == 0:
+        print("Error: No nodes found to build the graph. Cannot proceed.")
+        return {}, {}, {}, layer_sizes # Return empty mappings
 
-        # Get name and unique ID from columns specified in config
-        qgis_name = row.get(name_col) # Use .get() for safer access
-        qgis_unique_id = row.get(id_col) # Use .get() for safer access
+    # Drop locations repeated across chunks in one pass: np.unique over every kept key gives each
+    # location's first row overall, so the first node at each location wins
+    if len({keys.dtype for keys in kept_keys}) > 1:
+        # Some coordinates were too large to pack; compare every key as an (x, y) record
+        kept_keys = [widen_coord_keys(keys) for keys in kept_keys]
+    first_rows = np.sort(np.unique(np.concatenate(kept_keys), return_index=True)[1])
+    node_geometries = np.concatenate(kept_geometries)[first_rows]
+    qgis_names = np.concatenate(kept_names)[first_rows]
+    qgis_unique_ids = np.concatenate(kept_ids)[first_rows]
 
-        # Handle missing or empty values gracefully
-        qgis_name = str(qgis_name).strip() if pd.notna(qgis_name) else f"Unnamed_Node_NX_{current_networkx_id}"
-        qgis_unique_id = str(qgis_unique_id).strip() if pd.notna(qgis_unique_id) else f"QGIS_ID_NX_{current_networkx_id}"
+    # Handle missing or empty values gracefully; NetworkX IDs are simply the row positions
+    networkx_id_labels = np.arange(len(node_geometries)).astype(str)
+    qgis_names = np.where(pd.isna(qgis_names), np.char.add("Unnamed_Node_NX_", networkx_id_labels), qgis_names)
+    qgis_unique_ids = np.where(pd.isna(qgis_unique_ids), np.char.add("QGIS_ID_NX_", networkx_id_labels), qgis_unique_ids)
 
+    qgis_names = qgis_names.tolist()
+    qgis_unique_ids = qgis_unique_ids.tolist()
+    networkx_id_to_details = {
+        networkx_id: {
+            'geometry': point_geom,
+            'name': qgis_name,
+            'qgis_id': qgis_unique_id # This 'qgis_id' key holds the value from your QGIS_UNIQUE_ID_COLUMN ('id')
+        }
+        for networkx_id, (point_geom, qgis_name, qgis_unique_id) in enumerate(zip(node_geometries, qgis_names, qgis_unique_ids))
+    }
 
-        if coords_key not in node_coords_to_networkx_id:
-            networkx_id = current_networkx_id
-            node_coords_to_networkx_id[coords_key] = networkx_id
-            networkx_id_to_details[networkx_id] = {
-                'geometry': point_geom,
-                'name': qgis_name,
-                'qgis_id': qgis_unique_id # This 'qgis_id' key holds the value from your QGIS_UNIQUE_ID_COLUMN ('id')
-            }
-            current_networkx_id += 1
+    # Reverse lookups, filled back to front so the first node with a repeated ID or name wins
+    reversed_networkx_ids = range(len(networkx_id_to_details) - 1, -1, -1)
+    id_index = dict(zip(reversed(qgis_unique_ids), reversed_networkx_ids))
+    name_index = dict(zip((qgis_name.lower() for qgis_name in reversed(qgis_names)), reversed_networkx_ids))
 
-    print(f"Actual unique nodes after precision matching: {len(node_coords_to_networkx_id)}")
-    return node_coords_to_networkx_id, networkx_id_to_details
\ No newline at end of file
+    print(f"Actual unique nodes after precision matching: {len(networkx_id_to_details)}")
+    return networkx_id_to_details, id_index, name_index, layer_sizes
\ No newline at end of file
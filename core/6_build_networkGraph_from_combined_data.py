@@ -1,38 +1,91 @@
-def build_network_graph(road_lines_gdf, node_coords_to_networkx_id, precision):
+def build_network_graph(road_lines_gdf, networkx_id_to_details, precision, keep_edge_geometries=False):
     """
-    Builds a NetworkX graph from road lines and node mappings.
+    Builds the road graph from road lines and node mappings.
+    road_lines_gdf may be one GeoDataFrame or an iterable of GeoDataFrame chunks
+    (see load_geospatial_data); each chunk is turned into edges and then dropped.
+    Each line endpoint is snapped to the nearest node within sqrt(2) * 10**-precision
+    using a shapely STRtree, which covers every pair that rounds to the same
+    coordinates at `precision` decimals; endpoints with no node that close are left unconnected.
+    Edges are kept as parallel arrays (structure of arrays) rather than a
+    NetworkX dict-of-dicts; get_csr_adjacency turns them into CSR for BFS.
+    Pathfinding and the printed directions only need each edge's description,
+    so the road LineStrings are dropped unless keep_edge_geometries is True
+    (e.g. for drawing routes on a map).
     Returns:
-        networkx.Graph: The constructed graph.
+        dict: The graph, with keys
+              'num_nodes': node count (node IDs are 0..num_nodes-1),
+              'edge_src', 'edge_dst': int32 arrays of each edge's end nodes,
+              'edge_descriptions': object array, one entry per edge,
+              'edge_geometries': object array of road LineStrings (only with keep_edge_geometries),
+              'edge_index': {(min(u, v), max(u, v)): edge position} for description lookups,
+              'crs': the road layer's CRS.
     """
-    print("Building the NetworkX graph...")
-    G = nx.Graph()
+    import pandas as pd
+    import shapely
 
-    # Add all nodes that were identified
-    G.add_nodes_from(node_coords_to_networkx_id.values())
+    print("Building the road graph...")
 
-    for idx, row in road_lines_gdf.iterrows():
-        line_geom = row.geometry
-        line_description = row['description'] if 'description' in row and pd.notna(row['description']) else 'unnamed path'
+    # Index every node once; each road chunk is then snapped against the same tree
+    node_ids = np.fromiter(networkx_id_to_details.keys(), dtype=np.int64, count=len(networkx_id_to_details))
+    node_tree = shapely.STRtree([details['geometry'] for details in networkx_id_to_details.values()])
 
-        if isinstance(line_geom, LineString):
-            lines_to_process = [line_geom]
-        elif isinstance(line_geom, MultiLineString):
-            lines_to_process = list(line_geom.geoms)
-        else:
-            continue
+    road_chunks = [road_lines_gdf] if isinstance(road_lines_gdf, pd.DataFrame) else road_lines_gdf
+    src_chunks, dst_chunks, description_chunks, geometry_chunks = [], [], [], []
+    crs = None
+    for chunk_gdf in road_chunks:
+        if crs is None:
+            crs = chunk_gdf.crs
 
-        for single_line in lines_to_process:
-            start_point_coords = single_line.coords[0]
-            end_point_coords = single_line.coords[-1]
+        # Flatten MultiLineStrings straight from the geometry array; part_rows maps each part back to its road row
+        line_geoms, part_rows = shapely.get_parts(chunk_gdf.geometry.values, return_index=True)
+        num_coords = shapely.get_num_coordinates(line_geoms)
+        is_line = (shapely.get_type_id(line_geoms) == 1) & (num_coords > 0) # Non-empty LineStrings only
+        line_geoms, part_rows, num_coords = line_geoms[is_line], part_rows[is_line], num_coords[is_line]
+        line_descriptions = stripped_column_values(chunk_gdf, 'description')[part_rows]
 
-            start_key = f"{start_point_coords[0]:.{precision}f},{start_point_coords[1]:.{precision}f}"
-            end_key = f"{end_point_coords[0]:.{precision}f},{end_point_coords[1]:.{precision}f}"
+        # Pull every vertex out in one vectorized call; per-line offsets give each line's first and last vertex
+        coords = shapely.get_coordinates(line_geoms)
+        offsets = np.concatenate([[0], np.cumsum(num_coords)])
+        first_vertex = offsets[:-1]
+        last_vertex = offsets[1:] - 1
 
-            u = node_coords_to_networkx_id.get(start_key)
-            v = node_coords_to_networkx_id.get(end_key)
+        # Snap all line endpoints (starts, then ends) to their nearest node in one STRtree query (-1 where none is close enough)
+        endpoints = shapely.points(np.concatenate([coords[first_vertex], coords[last_vertex]]))
+        # Points rounding to the same grid cell can be up to one unit apart on each axis, i.e. sqrt(2) units
+        endpoint_index, tree_index = node_tree.query_nearest(endpoints, max_distance=np.sqrt(2) * 10 ** -precision, all_matches=False)
+        endpoint_node_ids = np.full(len(endpoints), -1, dtype=np.int64)
+        endpoint_node_ids[endpoint_index] = node_ids[tree_index]
+        us = endpoint_node_ids[:len(first_vertex)]
+        vs = endpoint_node_ids[len(first_vertex):]
 
-            if u is not None and v is not None and u != v:
-                G.add_edge(u, v, geometry=single_line, description=str(line_description).strip())
+        is_edge = (us >= 0) & (vs >= 0) & (us != vs)
+        line_descriptions[pd.isna(line_descriptions)] = 'unnamed path'
+        src_chunks.append(us[is_edge].astype(np.int32))
+        dst_chunks.append(vs[is_edge].astype(np.int32))
+        description_chunks.append(line_descriptions[is_edge])
+        if keep_edge_geometries:
+            geometry_chunks.append(line_geoms[is_edge])
 
-    print(f"NetworkX graph built: {G.number_of_nodes()} nodes, {G.number_of_edges()} edges.")
-    return G
\ No newline at end of file
+    edge_src = np.concatenate([np.empty(0, dtype=np.int32)] + src_chunks)
+    edge_dst = np.concatenate([np.empty(0, dtype=np.int32)] + dst_chunks)
+
+    # The graph is undirected, so (u, v) and (v, u) are one edge. Roads joining the
+    # same two nodes stay separate entries; the pair maps to the last of them.
+    edge_index = {
+        node_pair: edge_position
+        for edge_position, node_pair in enumerate(zip(np.minimum(edge_src, edge_dst).tolist(), np.maximum(edge_src, edge_dst).tolist()))
+    }
+
+    graph = {
+        'num_nodes': len(networkx_id_to_details),
+        'edge_src': edge_src,
+        'edge_dst': edge_dst,
+        'edge_descriptions': np.concatenate([np.empty(0, dtype=object)] + description_chunks),
+        'edge_index': edge_index,
+        'crs': crs,
+    }
+    if keep_edge_geometries:
+        graph['edge_geometries'] = np.concatenate([np.empty(0, dtype=object)] + geometry_chunks)
+
+    print(f"Road graph built: {graph['num_nodes']} nodes, {len(edge_index)} edges.")
+    return graph
\ No newline at end of file
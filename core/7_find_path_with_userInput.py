@@ -1,22 +1,14 @@
-def find_and_print_path(graph, start_id_str, end_id_str, search_type, networkx_id_to_details):
+# Shortest paths already computed this session, keyed by (start, end) NetworkX IDs.
+# The graph is undirected, so every result is also stored reversed under (end, start).
+_PATH_CACHE = {}
+
+def find_and_print_path(graph, start_networkx_id, end_networkx_id, networkx_id_to_details):
     """
-    Finds and prints the shortest path between two identifiers,
-    with a summary header and detailed output.
+    Finds and prints the shortest path between two NetworkX node IDs
+    (already resolved with find_networkx_id), with a summary header and detailed output.
     """
     print("\n--- Calculating Shortest Path ---")
 
-    # Pass search_type directly to find_networkx_id
-    start_networkx_id = find_networkx_id(start_id_str, networkx_id_to_details, search_by=search_type)
-    end_networkx_id = find_networkx_id(end_id_str, networkx_id_to_details, search_by=search_type)
-
-    # These checks are now handled by the calling interactive loop, but kept for standalone function clarity
-    if start_networkx_id is None:
-        print(f"Error: Start node '{start_id_str}' not found in graph using '{search_type}'. Please check your data for exact ID/Name.")
-        return
-    if end_networkx_id is None:
-        print(f"Error: End node '{end_id_str}' not found in graph using '{search_type}'. Please check your data for exact ID/Name.")
-        return
-
     # Get names for summary output
     start_node_name = networkx_id_to_details[start_networkx_id]['name']
     start_node_qgis_id = networkx_id_to_details[start_networkx_id]['qgis_id']
@@ -32,11 +24,33 @@ def find_and_print_path(graph, start_id_str, end_id_str, search_type, networkx_i
         return
     else:
         print(f"\nSearching for path from '{start_node_name}' (Unique ID: {start_node_qgis_id}) to '{end_node_name}' (Unique ID: {end_node_qgis_id}).")
-        path_networkx_ids = bfs_shortest_path(graph, start_networkx_id, end_networkx_id)
+        path_key = (start_networkx_id, end_networkx_id)
+        if path_key in _PATH_CACHE:
+            path_networkx_ids = _PATH_CACHE[path_key]
+        else:
+            if NUMBA_AVAILABLE:
+                # Compiled bidirectional CSR search on the graph's reusable scratch buffers
+                indptr, indices = get_csr_adjacency(graph)
+                state, queue = get_bfs_scratch(graph)
+                path_networkx_ids = bidirectional_bfs_csr_reusing(indptr, indices, start_networkx_id, end_networkx_id, state, queue).tolist() or None
+            else:
+                # Without Numba, paths come from cached BFS trees (grown via SciPy when installed).
+                # A tree already grown from the end node answers the query reversed.
+                pred_cache = graph.get('pred_cache', {})
+                if start_networkx_id not in pred_cache and end_networkx_id in pred_cache:
+                    end_tree = pred_cache[end_networkx_id]
+                    path_networkx_ids = reconstruct_path(end_tree, start_networkx_id)[::-1] if start_networkx_id in end_tree else None
+                else:
+                    start_tree = get_pred_tree(graph, start_networkx_id)
+                    path_networkx_ids = reconstruct_path(start_tree, end_networkx_id) if end_networkx_id in start_tree else None
+            _PATH_CACHE[path_key] = path_networkx_ids
+            _PATH_CACHE[(end_networkx_id, start_networkx_id)] = path_networkx_ids[::-1] if path_networkx_ids else None
 
         if path_networkx_ids:
             # --- Summary Output ---
-            path_qgis_ids = [networkx_id_to_details[nx_id]['qgis_id'] for nx_id in path_networkx_ids]
+            # Look up each node's details once and reuse them for the summary and the directions
+            path_details = [networkx_id_to_details[nx_id] for nx_id in path_networkx_ids]
+            path_qgis_ids = [node_info['qgis_id'] for node_info in path_details]
             print(f"\nPath found:")
             print(f"Start location identifier: {start_node_qgis_id}; Name: \"{start_node_name}\"")
             print(f"Destination identifier: {end_node_qgis_id}; Name: \"{end_node_name}\"")
@@ -46,21 +60,22 @@ def find_and_print_path(graph, start_id_str, end_id_str, search_type, networkx_i
             print("\n--- Step-by-Step Directions ---")
             print(f"This journey will take {len(path_networkx_ids) - 1} steps (road segments).")
 
-            for i in range(len(path_networkx_ids)):
-                current_node_id = path_networkx_ids[i]
-                node_info = networkx_id_to_details[current_node_id]
-
-                print(f"Step {i+1}: Arrive at '{node_info['name']}' (Node ID: {node_info['qgis_id']}) at coordinates ({node_info['geometry'].x:.{COORD_PRECISION}f}, {node_info['geometry'].y:.{COORD_PRECISION}f}).")
-
+            # Collect the directions and write them out in one call instead of one print per line
+            direction_lines = []
+            edge_index, edge_descriptions = graph['edge_index'], graph['edge_descriptions']
+            for i, (current_node_id, node_info) in enumerate(zip(path_networkx_ids, path_details)):
+                direction_lines.append(f"Step {i+1}: Arrive at '{node_info['name']}' (Node ID: {node_info['qgis_id']}) at coordinates ({node_info['geometry'].x:.{COORD_PRECISION}f}, {node_info['geometry'].y:.{COORD_PRECISION}f}).")
 
                 if i < len(path_networkx_ids) - 1:
                     next_node_id = path_networkx_ids[i+1]
-                    if graph.has_edge(current_node_id, next_node_id):
-                        edge_data = graph.get_edge_data(current_node_id, next_node_id)
-                        line_description = edge_data.get('description', 'an unnamed path')
-                        print(f"    - From here, proceed along '{line_description}' towards the next location.")
+                    # One lookup both checks the edge exists and finds its description
+                    edge_position = edge_index.get((min(current_node_id, next_node_id), max(current_node_id, next_node_id)))
+                    if edge_position is not None:
+                        line_description = edge_descriptions[edge_position]
+                        direction_lines.append(f"    - From here, proceed along '{line_description}' towards the next location.")
                     else:
-                        print(f"    - WARNING: No direct road description found between '{node_info['name']}' and '{networkx_id_to_details[next_node_id]['name']}'.")
+                        direction_lines.append(f"    - WARNING: No direct road description found between '{node_info['name']}' and '{path_details[i+1]['name']}'.")
+            sys.stdout.write("\n".join(direction_lines) + "\n")
             print("\nJourney complete!")
 
         else:
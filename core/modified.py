@@ -1,9 +1,3 @@
-import geopandas as gpd
-import networkx as nx
-from shapely.geometry import LineString, MultiLineString, Point
-from collections import deque
-import pandas as pd
-
 # --- Configuration: SET YOUR FILE PATHS AND COLUMN NAMES HERE ---
 ROAD_LINES_FILE = "ROAD_NETWORK_finale.geojson"
 ROAD_INTERSECTIONS_FILE = "all_intersections_pro.geojson"
@@ -14,194 +8,721 @@ QGIS_UNIQUE_ID_COLUMN = 'id' # IMPORTANT: Set to 'id' (lowercase) to match QGIS
 
 COORD_PRECISION = 6
 
-# --- Helper Function: Breadth-First Search (BFS) Algorithm ---
-def bfs_shortest_path(graph, start_node, end_node):
-    """
-    Finds the shortest path in an unweighted graph using BFS.
-    Returns a list of NetworkX node IDs forming the path, or None if no path.
-    """
-    if start_node == end_node:
-        return [start_node]
-    if start_node not in graph or end_node not in graph:
-        return None
+# Features per chunk when streaming the GeoJSON layers; caps peak memory on very large files
+READ_CHUNK_SIZE = 100_000
 
-    queue = deque([(start_node, [start_node])])
-    visited = {start_node}
+# The built graph is pickled here (next to the GeoJSON files) and reused until a source file or setting changes.
+# Set to None to always rebuild. Bump GRAPH_CACHE_VERSION whenever the cached graph's layout changes.
+GRAPH_CACHE_FILE = "graph_cache.pkl"
+GRAPH_CACHE_VERSION = 3
 
-    while queue:
-        current_node, path = queue.popleft()
+# Heavy geospatial libraries (geopandas, shapely, pandas) are imported
+# inside the functions that use them, so startup and early exits stay cheap.
 
-        if current_node == end_node:
-            return path
+import sys
+from collections import deque
+import numpy as np
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    # Numba is optional: without it the @njit kernels still work, just as plain (slower) Python
+    NUMBA_AVAILABLE = False
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+    prange = range
+
+# --- Helper Function: Rebuild a Path from Parent Pointers ---
+def reconstruct_path(parent, end_node):
+    """
+    Walks the parent pointers back from end_node and reverses the result.
+    Returns a list of NetworkX node IDs from the search root to end_node.
+    """
+    path = []
+    current_node = end_node
+    while current_node is not None:
+        path.append(current_node)
+        current_node = parent[current_node]
+    return path[::-1]
+
+# --- Helper Function: Plain Adjacency Lists for BFS ---
+def get_adj_list(graph):
+    """
+    Returns the graph's adjacency as a plain {node: [neighbors]} dict, built once
+    from the CSR arrays and stored in graph['adj_list']. Only get_pred_tree's
+    pure-Python fallback needs it, so it is never built when Numba or SciPy is used.
+    """
+    adj = graph.get('adj_list')
+    if adj is None:
+        indptr, indices = get_csr_adjacency(graph)
+        indptr, indices = indptr.tolist(), indices.tolist()
+        adj = graph['adj_list'] = {node: indices[indptr[node]:indptr[node + 1]] for node in range(graph['num_nodes'])}
+    return adj
+
+# --- Helper Function: Single-Source BFS Predecessor Tree ---
+def get_pred_tree(graph, source_node):
+    """
+    Runs one full BFS from source_node and returns its predecessor tree
+    ({node: parent}, with the source mapped to None). Trees are memoized per
+    source in graph['pred_cache'], so every later query from the same
+    source is just a parent backtrace with no graph traversal.
+    The traversal runs in C via SciPy when it is installed, over the CSR arrays
+    from get_csr_adjacency, and falls back to a pure-Python BFS otherwise.
+    """
+    pred_cache = graph.setdefault('pred_cache', {})
+    if source_node in pred_cache:
+        return pred_cache[source_node]
 
-        for neighbor in graph.neighbors(current_node):
-            if neighbor not in visited:
-                visited.add(neighbor)
-                queue.append((neighbor, path + [neighbor]))
-    return None
+    try:
+        from scipy.sparse import csr_matrix
+        from scipy.sparse.csgraph import breadth_first_order
+    except ImportError:
+        # SciPy is optional: without it the tree is grown in pure Python below
+        csr_matrix = None
+
+    if csr_matrix is not None:
+        indptr, indices = get_csr_adjacency(graph)
+        n = len(indptr) - 1
+        adjacency_matrix = csr_matrix((np.ones(len(indices), dtype=np.int8), indices, indptr), shape=(n, n))
+        node_order, predecessors = breadth_first_order(adjacency_matrix, source_node, directed=True, return_predecessors=True)
+        # node_order lists every reached node; the source's predecessor entry is a placeholder
+        parent = dict(zip(node_order.tolist(), predecessors[node_order].tolist()))
+        parent[source_node] = None
+    else:
+        adj = get_adj_list(graph)
+        queue = deque([source_node])
+        parent = {source_node: None}
+        while queue:
+            current_node = queue.popleft()
+            for neighbor in adj[current_node]:
+                if neighbor not in parent:
+                    parent[neighbor] = current_node
+                    queue.append(neighbor)
+
+    pred_cache[source_node] = parent
+    return parent
+
+
+# --- Helper Function: Compressed Sparse Row (CSR) Adjacency ---
+def get_csr_adjacency(graph):
+    """
+    Returns the graph's adjacency in CSR form as two int32 arrays, built once from
+    the edge arrays and stored in graph['csr']: the neighbors of node u are
+    indices[indptr[u]:indptr[u + 1]]. Each edge is listed under both of its end
+    nodes, and every node's neighbors keep the order their edges were added in.
+    Returns:
+        tuple: (indptr, indices)
+    """
+    csr = graph.get('csr')
+    if csr is None:
+        n = graph['num_nodes']
+        # Interleave both directions edge by edge, then a stable sort groups them by source node
+        sources = np.column_stack([graph['edge_src'], graph['edge_dst']]).ravel()
+        targets = np.column_stack([graph['edge_dst'], graph['edge_src']]).ravel()
+        indptr = np.zeros(n + 1, dtype=np.int32)
+        np.cumsum(np.bincount(sources, minlength=n), out=indptr[1:])
+        indices = targets[np.argsort(sources, kind='stable')].astype(np.int32)
+        csr = graph['csr'] = (indptr, indices)
+    return csr
+
+# --- Helper Function: Reusable BFS Scratch Buffers ---
+def get_bfs_scratch(graph):
+    """
+    Returns the (state, queue) scratch buffers for bidirectional_bfs_csr_reusing,
+    allocated once and stored in graph['bfs_scratch'], so repeated interactive
+    queries do not allocate them per search. Each search leaves every parent
+    entry -1 again, ready for the next query. The buffers must not be shared
+    between threads; bfs_many allocates its own.
+    Returns:
+        tuple: (state, queue)
+    """
+    scratch = graph.get('bfs_scratch')
+    if scratch is None:
+        n = graph['num_nodes']
+        scratch = graph['bfs_scratch'] = (np.full((2, n, 2), -1, dtype=np.int64), np.empty((2, n), dtype=np.int64))
+    return scratch
+
+# --- Helper Function: Bidirectional BFS on Caller-Owned Scratch Buffers ---
+@njit(cache=True, nogil=True)
+def bidirectional_bfs_csr_reusing(indptr, indices, start_node, end_node, state, queue):
+    """
+    Finds the shortest path over the CSR arrays from get_csr_adjacency with a
+    compiled bidirectional BFS: one search grows from each end, the smaller
+    frontier is always expanded by a full level, and the two parent chains are
+    stitched together where the searches meet. The scratch buffers belong to
+    the caller so they can be reused across queries: state is a (2, n, 2) int64
+    array filled with -1 holding each node's [parent, depth] side by side, and
+    queue a (2, n) int64 array. Row 0 of each belongs to the search from
+    start_node and row 1 to the search from end_node. The stored depths size
+    the path directly, and only the entries this search touched are reset to
+    -1 before returning, so a query costs time in proportion to the nodes it visits.
+    Returns:
+        numpy.ndarray: The path as int64 node IDs, or an empty array if no path.
+    """
+    if start_node == end_node:
+        return np.full(1, start_node, dtype=np.int64)
+
+    level_start = np.zeros(2, dtype=np.int64)
+    level_end = np.ones(2, dtype=np.int64)
+    state[0, start_node, 0] = start_node
+    state[0, start_node, 1] = 0
+    state[1, end_node, 0] = end_node
+    state[1, end_node, 1] = 0
+    queue[0, 0] = start_node
+    queue[1, 0] = end_node
+    meeting_node = -1
+
+    while meeting_node == -1 and level_start[0] < level_end[0] and level_start[1] < level_end[1]:
+        # Expand whichever side currently has the smaller frontier
+        side = 0 if level_end[0] - level_start[0] <= level_end[1] - level_start[1] else 1
+        other = 1 - side
+        tail = level_end[side]
+        for q in range(level_start[side], level_end[side]):
+            current_node = queue[side, q]
+            for k in range(indptr[current_node], indptr[current_node + 1]):
+                neighbor = indices[k]
+                if state[side, neighbor, 0] == -1:
+                    state[side, neighbor, 0] = current_node
+                    state[side, neighbor, 1] = state[side, current_node, 1] + 1
+                    queue[side, tail] = neighbor
+                    tail += 1
+                if state[other, neighbor, 0] != -1: # The two searches have met
+                    meeting_node = neighbor
+                    break
+            if meeting_node != -1:
+                break
+        level_start[side] = level_end[side]
+        level_end[side] = tail
+
+    if meeting_node == -1:
+        path = np.empty(0, dtype=np.int64)
+    else:
+        # Write start..meeting_node back to front and meeting_node..end front to back
+        forward_length = state[0, meeting_node, 1] + 1
+        path = np.empty(forward_length + state[1, meeting_node, 1], dtype=np.int64)
+        current_node = meeting_node
+        for i in range(forward_length - 1, -1, -1):
+            path[i] = current_node
+            current_node = state[0, current_node, 0]
+        current_node = meeting_node
+        for i in range(forward_length, len(path)):
+            current_node = state[1, current_node, 0]
+            path[i] = current_node
+
+    # Every node either side visited is still in its queue, so only those entries need clearing
+    for side in range(2):
+        for q in range(level_end[side]):
+            state[side, queue[side, q], 0] = -1
+    return path
+
+# --- Helper Function: Many Shortest-Path Queries in Parallel ---
+@njit(cache=True, nogil=True, parallel=True)
+def bfs_many(indptr, indices, starts, ends):
+    """
+    Answers many shortest-path queries (starts[i] to ends[i]) at once over the
+    CSR arrays, spreading blocks of queries across all cores with prange; each
+    block reuses one set of scratch buffers (see bidirectional_bfs_csr_reusing).
+    Returns:
+        tuple: (offsets, nodes) as int64 arrays; query i's path is
+               nodes[offsets[i]:offsets[i + 1]], empty if there is no path.
+    """
+    n = len(indptr) - 1
+    num_queries = len(starts)
+    queries_per_block = 64 # Queries sharing one set of scratch buffers
+    # Each block stores its paths in one row of block_paths, sized for this average path length (in nodes);
+    # queries whose paths overflow the row are searched again in the copy pass
+    average_path_nodes = 64
+    num_blocks = (num_queries + queries_per_block - 1) // queries_per_block
+    row_capacity = queries_per_block * min(n, average_path_nodes)
+
+    path_lengths = np.zeros(num_queries, dtype=np.int64)
+    stored = np.zeros(num_queries, dtype=np.bool_)
+    block_paths = np.empty((num_blocks, row_capacity), dtype=np.int64)
+    for block in prange(num_blocks):
+        state = np.full((2, n, 2), -1, dtype=np.int64)
+        queue = np.empty((2, n), dtype=np.int64)
+        row_used = 0
+        for i in range(block * queries_per_block, min((block + 1) * queries_per_block, num_queries)):
+            path = bidirectional_bfs_csr_reusing(indptr, indices, starts[i], ends[i], state, queue)
+            path_lengths[i] = len(path)
+            if row_used + len(path) <= row_capacity:
+                block_paths[block, row_used:row_used + len(path)] = path
+                row_used += len(path)
+                stored[i] = True
+
+    offsets = np.zeros(num_queries + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(path_lengths)
+    nodes = np.empty(offsets[-1], dtype=np.int64)
+    for block in prange(num_blocks):
+        first_query = block * queries_per_block
+        last_query = min(first_query + queries_per_block, num_queries)
+        # Scratch buffers are only needed if some of this block's paths overflowed its row
+        scratch_size = 0 if stored[first_query:last_query].all() else n
+        state = np.full((2, scratch_size, 2), -1, dtype=np.int64)
+        queue = np.empty((2, scratch_size), dtype=np.int64)
+        row_used = 0
+        for i in range(first_query, last_query):
+            if stored[i]:
+                nodes[offsets[i]:offsets[i + 1]] = block_paths[block, row_used:row_used + path_lengths[i]]
+                row_used += path_lengths[i]
+            else:
+                nodes[offsets[i]:offsets[i + 1]] = bidirectional_bfs_csr_reusing(indptr, indices, starts[i], ends[i], state, queue)
+    return offsets, nodes
 
 # --- Helper Function: Find NetworkX ID from QGIS ID or Name ---
-# MODIFICATION: Changed how search_by is handled within this function
-def find_networkx_id(identifier, details_dict, search_by='id'): # Default search_by to 'id'
+def find_networkx_id(identifier, id_index, name_index, search_by='id'): # Default search_by to 'id'
     """
     Finds the NetworkX node ID given a QGIS ID (from 'id' column) or Name.
     Args:
         identifier (str): The QGIS 'id' or 'Name' to search for.
-        details_dict (dict): The networkx_id_to_details dictionary.
-        search_by (str): 'id' or 'name' to specify which attribute to search.
-                         'id' directly corresponds to the 'qgis_id' key in details_dict,
-                         which stores values from QGIS_UNIQUE_ID_COLUMN.
+        id_index (dict): QGIS ID -> NetworkX ID, as returned by prepare_graph_nodes.
+                         Its keys are the values from QGIS_UNIQUE_ID_COLUMN.
+        name_index (dict): Lower-cased name -> NetworkX ID, as returned by prepare_graph_nodes.
+        search_by (str): 'id' or 'name' to specify which index to search.
     Returns:
         int: The corresponding NetworkX node ID, or None if not found.
     """
     stripped_identifier = str(identifier).strip()
-    for networkx_id, details in details_dict.items():
-        # The 'qgis_id' key in details_dict stores values from QGIS_UNIQUE_ID_COLUMN ('id')
-        if search_by == 'id': # Directly check for 'id' from user input
-            # Case-sensitive matching for QGIS_ID (from the 'id' column)
-            if details['qgis_id'] == stripped_identifier:
-                return networkx_id
-        elif search_by == 'name':
-            # Name matching remains case-insensitive
-            if details['name'].lower() == stripped_identifier.lower():
-                return networkx_id
+    if search_by == 'id':
+        # Case-sensitive matching for QGIS_ID (from the 'id' column)
+        return id_index.get(stripped_identifier)
+    elif search_by == 'name':
+        # Name matching remains case-insensitive
+        return name_index.get(stripped_identifier.lower())
     return None
 
-# --- Main Functions for Geospatial Graph Processing ---
-
-def load_geospatial_data(road_lines_path, intersections_path, buildings_path):
+# --- Helper Function: Read One GeoJSON Layer ---
+def read_geojson(path, columns):
     """
-    Loads geospatial data from specified GeoJSON files.
+    Reads a GeoJSON file through pyogrio with Arrow, which hands GDAL's columns
+    over in one batch instead of building Python objects feature by feature.
+    Arrow reads need pyogrio, pyarrow and GDAL >= 3.6; if that fails the file is
+    read again with geopandas' default engine, so a genuinely bad path still raises.
     Returns:
-        tuple: (road_lines_gdf, road_intersections_gdf, main_buildings_gdf)
+        geopandas.GeoDataFrame: The geometry plus whichever of `columns` exist.
     """
-    print("Loading geospatial data...")
+    import geopandas as gpd
+
     try:
-        road_lines_gdf = gpd.read_file(road_lines_path)
-        road_intersections_gdf = gpd.read_file(intersections_path)
-        main_buildings_gdf = gpd.read_file(buildings_path)
-        print("Geospatial data loaded successfully.")
-        return road_lines_gdf, road_intersections_gdf, main_buildings_gdf
-    except Exception as e:
-        print(f"Error loading geospatial files. Please check paths and file integrity: {e}")
-        return None, None, None
+        return gpd.read_file(path, engine="pyogrio", use_arrow=True, columns=columns)
+    except Exception:
+        return gpd.read_file(path, columns=columns)
 
-def prepare_graph_nodes(intersections_gdf, buildings_gdf, name_col, id_col, precision):
+# --- Helper Function: Stream One GeoJSON Layer in Chunks ---
+def iter_geojson_chunks(path, columns, chunk_size):
     """
-    Combines intersection and building GDFs and prepares node mappings for NetworkX.
-    Returns:
-        tuple: (node_coords_to_networkx_id, networkx_id_to_details)
+    Yields a GeoJSON layer as GeoDataFrames of at most chunk_size features,
+    streamed through pyogrio's Arrow reader so only one chunk is in memory at a
+    time. If streaming is unavailable or its first batch fails, the whole layer
+    is yielded as a single chunk from read_geojson.
     """
-    print("Combining all potential graph nodes (intersections + buildings)...")
+    import geopandas as gpd
+    import shapely
 
-    # Ensure CRSs match before concatenating
-    if intersections_gdf.crs != buildings_gdf.crs:
-        print(f"Warning: CRSs of road intersections ({intersections_gdf.crs}) and building layers ({buildings_gdf.crs}) differ. Reprojecting buildings to match intersections.")
-        try:
-            buildings_gdf = buildings_gdf.to_crs(intersections_gdf.crs)
-        except Exception as e:
-            print(f"Error reprojecting building layer: {e}")
-            print("Continuing without reprojecting, but CRS mismatch might cause issues.")
+    try:
+        import pyarrow # noqa: F401 - open_arrow(use_pyarrow=True) needs it
+        from pyogrio.raw import open_arrow
+    except ImportError:
+        yield read_geojson(path, columns)
+        return
 
-    all_graph_nodes_gdf = gpd.pd.concat([
-        intersections_gdf,
-        buildings_gdf
-    ]).drop_duplicates(subset=['geometry']).reset_index(drop=True)
+    streaming = False
+    try:
+        with open_arrow(path, columns=columns, batch_size=chunk_size, use_pyarrow=True) as (meta, batch_reader):
+            # GDAL names the WKB column 'wkb_geometry' when the layer gives it no name
+            geometry_name = meta['geometry_name'] or 'wkb_geometry'
+            for batch in batch_reader:
+                chunk_df = batch.to_pandas()
+                geometries = shapely.from_wkb(chunk_df.pop(geometry_name).to_numpy())
+                chunk_gdf = gpd.GeoDataFrame(chunk_df, geometry=geometries, crs=meta['crs'])
+                streaming = True
+                yield chunk_gdf
+    except Exception:
+        # Once chunks have been handed out, a failure cannot be retried without duplicating them
+        if streaming:
+            raise
+        yield read_geojson(path, columns)
+
+# --- Helper Function: Open a Layer Stream and Read Its First Chunk ---
+def open_geojson_chunks(path, columns, chunk_size):
+    """
+    Starts iter_geojson_chunks and pulls the first chunk right away, so a
+    missing or unreadable file raises here rather than later, mid-pipeline.
+    Returns:
+        iterator: Every chunk of the layer, the first one included.
+    """
+    from itertools import chain
 
-    print(f"Total unique potential nodes identified in combined GeoDataFrame: {len(all_graph_nodes_gdf)}")
+    chunks = iter_geojson_chunks(path, columns, chunk_size)
+    first_chunk = next(chunks, None)
+    return chunks if first_chunk is None else chain([first_chunk], chunks)
 
-    if len(all_graph_nodes_gdf) == 0:
-        print("Error: No nodes found to build the graph. Cannot proceed.")
-        return {}, {} # Return empty mappings
-
-    node_coords_to_networkx_id = {}
-    networkx_id_to_details = {}
-    current_networkx_id = 0
+# --- Helper Function: Fingerprint the Graph's Inputs ---
+def graph_cache_key(source_paths, *settings):
+    """
+    Describes everything the built graph depends on: the size and modification
+    time of each source file, plus any settings (columns, precision, cache version).
+    Returns:
+        tuple: The cache key, or None if a source file cannot be read.
+    """
+    import os
 
-    for idx, row in all_graph_nodes_gdf.iterrows():
-        point_geom = row.geometry
-        coords_key = f"{point_geom.x:.{precision}f},{point_geom.y:.{precision}f}"
+    try:
+        file_stats = tuple((path, os.stat(path).st_size, os.stat(path).st_mtime_ns) for path in source_paths)
+    except OSError:
+        return None
+    return file_stats + settings
 
-        # Get name and unique ID from columns specified in config
-        qgis_name = row.get(name_col) # Use .get() for safer access
-        qgis_unique_id = row.get(id_col) # Use .get() for safer access
+# --- Helper Function: Load a Previously Built Graph ---
+def load_graph_cache(cache_path, cache_key):
+    """
+    Loads the data pickled by save_graph_cache, so a run can skip reading the
+    GeoJSON files and rebuilding the graph entirely. Anything unreadable, or
+    written for a different cache key, counts as a miss.
+    Returns:
+        The cached data, or None on a cache miss.
+    """
+    import pickle
 
-        # Handle missing or empty values gracefully
-        qgis_name = str(qgis_name).strip() if pd.notna(qgis_name) else f"Unnamed_Node_NX_{current_networkx_id}"
-        qgis_unique_id = str(qgis_unique_id).strip() if pd.notna(qgis_unique_id) else f"QGIS_ID_NX_{current_networkx_id}"
+    if cache_path is None or cache_key is None:
+        return None
+    try:
+        with open(cache_path, 'rb') as f:
+            cached_key, cached_data = pickle.load(f)
+    except Exception:
+        return None
+    return cached_data if cached_key == cache_key else None
 
+# --- Helper Function: Save the Built Graph for Later Runs ---
+def save_graph_cache(cache_path, cache_key, data):
+    """
+    Pickles data together with its cache key. The file is written under a
+    temporary name and then swapped in, so an interrupted run never leaves a
+    half-written cache behind. Failing to write the cache is only a warning.
+    """
+    import os
+    import pickle
 
-        if coords_key not in node_coords_to_networkx_id:
-            networkx_id = current_networkx_id
-            node_coords_to_networkx_id[coords_key] = networkx_id
-            networkx_id_to_details[networkx_id] = {
-                'geometry': point_geom,
-                'name': qgis_name,
-                'qgis_id': qgis_unique_id # This 'qgis_id' key holds the value from your QGIS_UNIQUE_ID_COLUMN ('id')
-            }
-            current_networkx_id += 1
+    if cache_path is None or cache_key is None:
+        return
+    temp_path = f"{cache_path}.tmp"
+    try:
+        with open(temp_path, 'wb') as f:
+            pickle.dump((cache_key, data), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, cache_path)
+    except Exception as e:
+        print(f"Warning: Could not write graph cache '{cache_path}': {e}")
 
-    print(f"Actual unique nodes after precision matching: {len(node_coords_to_networkx_id)}")
-    return node_coords_to_networkx_id, networkx_id_to_details
+# --- Main Functions for Geospatial Graph Processing ---
 
-def build_network_graph(road_lines_gdf, node_coords_to_networkx_id, precision):
+def load_geospatial_data(road_lines_path, intersections_path, buildings_path, name_col, id_col, chunk_size=None):
     """
-    Builds a NetworkX graph from road lines and node mappings.
+    Loads geospatial data from specified GeoJSON files.
+    Files are read with pyogrio and Arrow (see read_geojson), and only the
+    geometry plus the columns the graph actually uses (road 'description',
+    node name_col and id_col) are parsed; any missing from a file are skipped.
+    With a chunk_size, each layer is instead streamed as an iterator of
+    GeoDataFrames of at most that many features (see iter_geojson_chunks), which
+    prepare_graph_nodes and build_network_graph consume one chunk at a time.
     Returns:
-        networkx.Graph: The constructed graph.
+        tuple: (road_lines_gdf, road_intersections_gdf, main_buildings_gdf)
     """
-    print("Building the NetworkX graph...")
-    G = nx.Graph()
-
-    # Add all nodes that were identified
-    G.add_nodes_from(node_coords_to_networkx_id.values())
-
-    for idx, row in road_lines_gdf.iterrows():
-        line_geom = row.geometry
-        line_description = row['description'] if 'description' in row and pd.notna(row['description']) else 'unnamed path'
-
-        if isinstance(line_geom, LineString):
-            lines_to_process = [line_geom]
-        elif isinstance(line_geom, MultiLineString):
-            lines_to_process = list(line_geom.geoms)
+    print("Loading geospatial data...")
+    try:
+        if chunk_size is None:
+            road_lines_gdf = read_geojson(road_lines_path, ['description'])
+            road_intersections_gdf = read_geojson(intersections_path, [name_col, id_col])
+            main_buildings_gdf = read_geojson(buildings_path, [name_col, id_col])
         else:
-            continue
+            road_lines_gdf = open_geojson_chunks(road_lines_path, ['description'], chunk_size)
+            road_intersections_gdf = open_geojson_chunks(intersections_path, [name_col, id_col], chunk_size)
+            main_buildings_gdf = open_geojson_chunks(buildings_path, [name_col, id_col], chunk_size)
+        print("Geospatial data loaded successfully.")
+        return road_lines_gdf, road_intersections_gdf, main_buildings_gdf
+    except Exception as e:
+        print(f"Error loading geospatial files. Please check paths and file integrity: {e}")
+        return None, None, None
 
-        for single_line in lines_to_process:
-            start_point_coords = single_line.coords[0]
-            end_point_coords = single_line.coords[-1]
+# --- Helper Function: Quantize Coordinates for Precision Matching ---
+def quantize_coords(xs, ys, precision):
+    """
+    Scales whole arrays of coordinates by 10**precision and rounds them to the
+    nearest integer, so coordinates that agree to `precision` decimals compare equal.
+    Returns:
+        tuple: (x_ints, y_ints) as int64 NumPy arrays.
+    """
+    scale = 10 ** precision
+    x_scaled = np.multiply(xs, scale)
+    y_scaled = np.multiply(ys, scale)
+    # np.rint rounds half to even exactly like np.round, minus its decimals handling, and works in place
+    np.rint(x_scaled, out=x_scaled)
+    np.rint(y_scaled, out=y_scaled)
+    return x_scaled.astype(np.int64), y_scaled.astype(np.int64)
+
+# Wide coordinate keys: one (x, y) record per point, for coordinates too large to pack
+COORD_PAIR_DTYPE = np.dtype([('x', np.int64), ('y', np.int64)])
+
+# --- Helper Function: Pack Quantized Coordinates into One Integer Key ---
+def pack_coord_keys(x_ints, y_ints):
+    """
+    Packs quantized x/y coordinates into a single int64 key per point, x in the
+    high 32 bits and y in the low 32 bits. Plain integers hash and compare far
+    faster than (x, y) tuples. Packing needs each axis to fit in 32 bits once
+    scaled, which holds for longitude/latitude at COORD_PRECISION = 6; when any
+    value does not (e.g. projected coordinates in metres), distinct points could
+    collide, so the keys are built as COORD_PAIR_DTYPE records instead.
+    Returns:
+        numpy.ndarray: one key per point, int64 or COORD_PAIR_DTYPE.
+    """
+    int32_range = np.iinfo(np.int32)
+    if len(x_ints) and (min(x_ints.min(), y_ints.min()) < int32_range.min or max(x_ints.max(), y_ints.max()) > int32_range.max):
+        return coord_pair_keys(x_ints, y_ints)
+    return (x_ints << 32) | (y_ints & 0xFFFFFFFF)
 
-            start_key = f"{start_point_coords[0]:.{precision}f},{start_point_coords[1]:.{precision}f}"
-            end_key = f"{end_point_coords[0]:.{precision}f},{end_point_coords[1]:.{precision}f}"
+# --- Helper Function: Wide (x, y) Coordinate Keys ---
+def coord_pair_keys(x_ints, y_ints):
+    """
+    Builds one COORD_PAIR_DTYPE record per point. These keys sort, deduplicate
+    and compare with np.unique/np.isin like packed keys, at any coordinate size.
+    Returns:
+        numpy.ndarray: COORD_PAIR_DTYPE keys, one per point.
+    """
+    keys = np.empty(len(x_ints), dtype=COORD_PAIR_DTYPE)
+    keys['x'] = x_ints
+    keys['y'] = y_ints
+    return keys
 
-            u = node_coords_to_networkx_id.get(start_key)
-            v = node_coords_to_networkx_id.get(end_key)
+# --- Helper Function: Widen Packed Coordinate Keys ---
+def widen_coord_keys(keys):
+    """
+    Converts packed int64 keys from pack_coord_keys back into COORD_PAIR_DTYPE
+    records, so they can be compared with wide keys. Wide keys pass through.
+    Returns:
+        numpy.ndarray: COORD_PAIR_DTYPE keys.
+    """
+    if keys.dtype == COORD_PAIR_DTYPE:
+        return keys
+    # The low 32 bits hold y as two's complement; sign-extend it back to int64
+    y_ints = ((keys & 0xFFFFFFFF) ^ 0x80000000) - 0x80000000
+    return coord_pair_keys(keys >> 32, y_ints)
+
+# --- Helper Function: Column Values as Stripped Strings ---
+def stripped_column_values(gdf, column):
+    """
+    Returns the values of a GeoDataFrame column as stripped strings in one
+    vectorized pass, with None wherever the value (or the whole column) is missing.
+    """
+    if column not in gdf.columns:
+        return np.full(len(gdf), None, dtype=object)
+    values = gdf[column]
+    return np.where(values.isna().to_numpy(), None, values.astype(str).str.strip().to_numpy())
 
-            if u is not None and v is not None and u != v:
-                G.add_edge(u, v, geometry=single_line, description=str(line_description).strip())
+def prepare_graph_nodes(intersections_gdf, buildings_gdf, name_col, id_col, precision):
+    """
+    Combines intersection and building GDFs and prepares node mappings for NetworkX.
+    Each layer may be a single GeoDataFrame or an iterable of GeoDataFrame chunks
+    (see load_geospatial_data); each chunk is deduplicated as it arrives, and one
+    final pass over the kept keys drops locations repeated across chunks.
+    Returns:
+        tuple: (networkx_id_to_details, id_index, name_index, layer_sizes)
+               networkx_id_to_details has one entry per unique node, keyed by NetworkX ID.
+               id_index maps each QGIS ID and name_index each lower-cased name
+               to its NetworkX ID, for O(1) lookups in find_networkx_id.
+               layer_sizes is (intersection count, building count) as loaded.
+    """
+    import pandas as pd
+    import shapely
 
-    print(f"NetworkX graph built: {G.number_of_nodes()} nodes, {G.number_of_edges()} edges.")
-    return G
+    print("Combining all potential graph nodes (intersections + buildings)...")
 
-def find_and_print_path(graph, start_id_str, end_id_str, search_type, networkx_id_to_details):
+    # Nodes unique within their chunk, one array per chunk, in intersections-then-buildings order
+    kept_geometries, kept_names, kept_ids, kept_keys = [], [], [], []
+    layer_sizes = []
+    reference_crs = None
+    for layer_name, layer_chunks in (("road intersections", intersections_gdf), ("building", buildings_gdf)):
+        if isinstance(layer_chunks, pd.DataFrame):
+            layer_chunks = [layer_chunks]
+        layer_size = 0
+        for chunk_index, chunk_gdf in enumerate(layer_chunks):
+            layer_size += len(chunk_gdf)
+            if reference_crs is None:
+                reference_crs = chunk_gdf.crs
+            elif chunk_gdf.crs != reference_crs:
+                # Ensure CRSs match before combining; all chunks of a layer share one CRS, so only the first reports
+                if chunk_index == 0:
+                    print(f"Warning: CRSs of road intersections ({reference_crs}) and {layer_name} layers ({chunk_gdf.crs}) differ. Reprojecting {layer_name} layer to match intersections.")
+                try:
+                    chunk_gdf = chunk_gdf.to_crs(reference_crs)
+                except Exception as e:
+                    if chunk_index == 0:
+                        print(f"Error reprojecting {layer_name} layer: {e}")
+                        print("Continuing without reprojecting, but CRS mismatch might cause issues.")
+
+            # Read every point's x/y in one vectorized call. get_coordinates skips missing geometries (and
+            # multi-part ones add rows), so if the rows no longer line up, read x and y per geometry instead
+            node_geoms = chunk_gdf.geometry.to_numpy()
+            node_coords = shapely.get_coordinates(node_geoms)
+            if len(node_coords) != len(node_geoms):
+                node_coords = np.column_stack([shapely.get_x(node_geoms), shapely.get_y(node_geoms)])
+
+            # Deduplicate on packed integer coordinate keys with plain NumPy instead of hashing shapely geometries:
+            # np.unique gives each location's first row in the chunk
+            packed_keys = pack_coord_keys(*quantize_coords(node_coords[:, 0], node_coords[:, 1], precision))
+            first_rows = np.sort(np.unique(packed_keys, return_index=True)[1])
+
+            kept_geometries.append(node_geoms[first_rows])
+            kept_names.append(stripped_column_values(chunk_gdf, name_col)[first_rows])
+            kept_ids.append(stripped_column_values(chunk_gdf, id_col)[first_rows])
+            kept_keys.append(packed_keys[first_rows])
+        layer_sizes.append(layer_size)
+    layer_sizes = tuple(layer_sizes)
+
+    print(f"Total potential nodes identified across all layers: {sum(layer_sizes)}")
+
+    if sum(layer_sizes) == 0:
+        print("Error: No nodes found to build the graph. Cannot proceed.")
+        return {}, {}, {}, layer_sizes # Return empty mappings
+
+    # Drop locations repeated across chunks in one pass: np.unique over every kept key gives each
+    # location's first row overall, so the first node at each location wins
+    if len({keys.dtype for keys in kept_keys}) > 1:
+        # Some coordinates were too large to pack; compare every key as an (x, y) record
+        kept_keys = [widen_coord_keys(keys) for keys in kept_keys]
+    first_rows = np.sort(np.unique(np.concatenate(kept_keys), return_index=True)[1])
+    node_geometries = np.concatenate(kept_geometries)[first_rows]
+    qgis_names = np.concatenate(kept_names)[first_rows]
+    qgis_unique_ids = np.concatenate(kept_ids)[first_rows]
+
+    # Handle missing or empty values gracefully; NetworkX IDs are simply the row positions
+    networkx_id_labels = np.arange(len(node_geometries)).astype(str)
+    qgis_names = np.where(pd.isna(qgis_names), np.char.add("Unnamed_Node_NX_", networkx_id_labels), qgis_names)
+    qgis_unique_ids = np.where(pd.isna(qgis_unique_ids), np.char.add("QGIS_ID_NX_", networkx_id_labels), qgis_unique_ids)
+
+    qgis_names = qgis_names.tolist()
+    qgis_unique_ids = qgis_unique_ids.tolist()
+    networkx_id_to_details = {
+        networkx_id: {
+            'geometry': point_geom,
+            'name': qgis_name,
+            'qgis_id': qgis_unique_id # This 'qgis_id' key holds the value from your QGIS_UNIQUE_ID_COLUMN ('id')
+        }
+        for networkx_id, (point_geom, qgis_name, qgis_unique_id) in enumerate(zip(node_geometries, qgis_names, qgis_unique_ids))
+    }
+
+    # Reverse lookups, filled back to front so the first node with a repeated ID or name wins
+    reversed_networkx_ids = range(len(networkx_id_to_details) - 1, -1, -1)
+    id_index = dict(zip(reversed(qgis_unique_ids), reversed_networkx_ids))
+    name_index = dict(zip((qgis_name.lower() for qgis_name in reversed(qgis_names)), reversed_networkx_ids))
+
+    print(f"Actual unique nodes after precision matching: {len(networkx_id_to_details)}")
+    return networkx_id_to_details, id_index, name_index, layer_sizes
+
+def build_network_graph(road_lines_gdf, networkx_id_to_details, precision, keep_edge_geometries=False):
+    """
+    Builds the road graph from road lines and node mappings.
+    road_lines_gdf may be one GeoDataFrame or an iterable of GeoDataFrame chunks
+    (see load_geospatial_data); each chunk is turned into edges and then dropped.
+    Each line endpoint is snapped to the nearest node within sqrt(2) * 10**-precision
+    using a shapely STRtree, which covers every pair that rounds to the same
+    coordinates at `precision` decimals; endpoints with no node that close are left unconnected.
+    Edges are kept as parallel arrays (structure of arrays) rather than a
+    NetworkX dict-of-dicts; get_csr_adjacency turns them into CSR for BFS.
+    Pathfinding and the printed directions only need each edge's description,
+    so the road LineStrings are dropped unless keep_edge_geometries is True
+    (e.g. for drawing routes on a map).
+    Returns:
+        dict: The graph, with keys
+              'num_nodes': node count (node IDs are 0..num_nodes-1),
+              'edge_src', 'edge_dst': int32 arrays of each edge's end nodes,
+              'edge_descriptions': object array, one entry per edge,
+              'edge_geometries': object array of road LineStrings (only with keep_edge_geometries),
+              'edge_index': {(min(u, v), max(u, v)): edge position} for description lookups,
+              'crs': the road layer's CRS.
+    """
+    import pandas as pd
+    import shapely
+
+    print("Building the road graph...")
+
+    # Index every node once; each road chunk is then snapped against the same tree
+    node_ids = np.fromiter(networkx_id_to_details.keys(), dtype=np.int64, count=len(networkx_id_to_details))
+    node_tree = shapely.STRtree([details['geometry'] for details in networkx_id_to_details.values()])
+
+    road_chunks = [road_lines_gdf] if isinstance(road_lines_gdf, pd.DataFrame) else road_lines_gdf
+    src_chunks, dst_chunks, description_chunks, geometry_chunks = [], [], [], []
+    crs = None
+    for chunk_gdf in road_chunks:
+        if crs is None:
+            crs = chunk_gdf.crs
+
+        # Flatten MultiLineStrings straight from the geometry array; part_rows maps each part back to its road row
+        line_geoms, part_rows = shapely.get_parts(chunk_gdf.geometry.values, return_index=True)
+        num_coords = shapely.get_num_coordinates(line_geoms)
+        is_line = (shapely.get_type_id(line_geoms) == 1) & (num_coords > 0) # Non-empty LineStrings only
+        line_geoms, part_rows, num_coords = line_geoms[is_line], part_rows[is_line], num_coords[is_line]
+        line_descriptions = stripped_column_values(chunk_gdf, 'description')[part_rows]
+
+        # Pull every vertex out in one vectorized call; per-line offsets give each line's first and last vertex
+        coords = shapely.get_coordinates(line_geoms)
+        offsets = np.concatenate([[0], np.cumsum(num_coords)])
+        first_vertex = offsets[:-1]
+        last_vertex = offsets[1:] - 1
+
+        # Snap all line endpoints (starts, then ends) to their nearest node in one STRtree query (-1 where none is close enough)
+        endpoints = shapely.points(np.concatenate([coords[first_vertex], coords[last_vertex]]))
+        # Points rounding to the same grid cell can be up to one unit apart on each axis, i.e. sqrt(2) units
+        endpoint_index, tree_index = node_tree.query_nearest(endpoints, max_distance=np.sqrt(2) * 10 ** -precision, all_matches=False)
+        endpoint_node_ids = np.full(len(endpoints), -1, dtype=np.int64)
+        endpoint_node_ids[endpoint_index] = node_ids[tree_index]
+        us = endpoint_node_ids[:len(first_vertex)]
+        vs = endpoint_node_ids[len(first_vertex):]
+
+        is_edge = (us >= 0) & (vs >= 0) & (us != vs)
+        line_descriptions[pd.isna(line_descriptions)] = 'unnamed path'
+        src_chunks.append(us[is_edge].astype(np.int32))
+        dst_chunks.append(vs[is_edge].astype(np.int32))
+        description_chunks.append(line_descriptions[is_edge])
+        if keep_edge_geometries:
+            geometry_chunks.append(line_geoms[is_edge])
+
+    edge_src = np.concatenate([np.empty(0, dtype=np.int32)] + src_chunks)
+    edge_dst = np.concatenate([np.empty(0, dtype=np.int32)] + dst_chunks)
+
+    # The graph is undirected, so (u, v) and (v, u) are one edge. Roads joining the
+    # same two nodes stay separate entries; the pair maps to the last of them.
+    edge_index = {
+        node_pair: edge_position
+        for edge_position, node_pair in enumerate(zip(np.minimum(edge_src, edge_dst).tolist(), np.maximum(edge_src, edge_dst).tolist()))
+    }
+
+    graph = {
+        'num_nodes': len(networkx_id_to_details),
+        'edge_src': edge_src,
+        'edge_dst': edge_dst,
+        'edge_descriptions': np.concatenate([np.empty(0, dtype=object)] + description_chunks),
+        'edge_index': edge_index,
+        'crs': crs,
+    }
+    if keep_edge_geometries:
+        graph['edge_geometries'] = np.concatenate([np.empty(0, dtype=object)] + geometry_chunks)
+
+    print(f"Road graph built: {graph['num_nodes']} nodes, {len(edge_index)} edges.")
+    return graph
+
+# Shortest paths already computed this session, keyed by (start, end) NetworkX IDs.
+# The graph is undirected, so every result is also stored reversed under (end, start).
+_PATH_CACHE = {}
+
+def find_and_print_path(graph, start_networkx_id, end_networkx_id, networkx_id_to_details):
     """
-    Finds and prints the shortest path between two identifiers,
-    with a summary header and detailed output.
+    Finds and prints the shortest path between two NetworkX node IDs
+    (already resolved with find_networkx_id), with a summary header and detailed output.
     """
     print("\n--- Calculating Shortest Path ---")
 
-    # Pass search_type directly to find_networkx_id
-    start_networkx_id = find_networkx_id(start_id_str, networkx_id_to_details, search_by=search_type)
-    end_networkx_id = find_networkx_id(end_id_str, networkx_id_to_details, search_by=search_type)
-
-    # These checks are now handled by the calling interactive loop, but kept for standalone function clarity
-    if start_networkx_id is None:
-        print(f"Error: Start node '{start_id_str}' not found in graph using '{search_type}'. Please check your data for exact ID/Name.")
-        return
-    if end_networkx_id is None:
-        print(f"Error: End node '{end_id_str}' not found in graph using '{search_type}'. Please check your data for exact ID/Name.")
-        return
-
     # Get names for summary output
     start_node_name = networkx_id_to_details[start_networkx_id]['name']
     start_node_qgis_id = networkx_id_to_details[start_networkx_id]['qgis_id']
@@ -217,11 +738,33 @@ def find_and_print_path(graph, start_id_str, end_id_str, search_type, networkx_i
         return
     else:
         print(f"\nSearching for path from '{start_node_name}' (Unique ID: {start_node_qgis_id}) to '{end_node_name}' (Unique ID: {end_node_qgis_id}).")
-        path_networkx_ids = bfs_shortest_path(graph, start_networkx_id, end_networkx_id)
+        path_key = (start_networkx_id, end_networkx_id)
+        if path_key in _PATH_CACHE:
+            path_networkx_ids = _PATH_CACHE[path_key]
+        else:
+            if NUMBA_AVAILABLE:
+                # Compiled bidirectional CSR search on the graph's reusable scratch buffers
+                indptr, indices = get_csr_adjacency(graph)
+                state, queue = get_bfs_scratch(graph)
+                path_networkx_ids = bidirectional_bfs_csr_reusing(indptr, indices, start_networkx_id, end_networkx_id, state, queue).tolist() or None
+            else:
+                # Without Numba, paths come from cached BFS trees (grown via SciPy when installed).
+                # A tree already grown from the end node answers the query reversed.
+                pred_cache = graph.get('pred_cache', {})
+                if start_networkx_id not in pred_cache and end_networkx_id in pred_cache:
+                    end_tree = pred_cache[end_networkx_id]
+                    path_networkx_ids = reconstruct_path(end_tree, start_networkx_id)[::-1] if start_networkx_id in end_tree else None
+                else:
+                    start_tree = get_pred_tree(graph, start_networkx_id)
+                    path_networkx_ids = reconstruct_path(start_tree, end_networkx_id) if end_networkx_id in start_tree else None
+            _PATH_CACHE[path_key] = path_networkx_ids
+            _PATH_CACHE[(end_networkx_id, start_networkx_id)] = path_networkx_ids[::-1] if path_networkx_ids else None
 
         if path_networkx_ids:
             # --- Summary Output ---
-            path_qgis_ids = [networkx_id_to_details[nx_id]['qgis_id'] for nx_id in path_networkx_ids]
+            # Look up each node's details once and reuse them for the summary and the directions
+            path_details = [networkx_id_to_details[nx_id] for nx_id in path_networkx_ids]
+            path_qgis_ids = [node_info['qgis_id'] for node_info in path_details]
             print(f"\nPath found:")
             print(f"Start location identifier: {start_node_qgis_id}; Name: \"{start_node_name}\"")
             print(f"Destination identifier: {end_node_qgis_id}; Name: \"{end_node_name}\"")
@@ -231,21 +774,22 @@ def find_and_print_path(graph, start_id_str, end_id_str, search_type, networkx_i
             print("\n--- Step-by-Step Directions ---")
             print(f"This journey will take {len(path_networkx_ids) - 1} steps (road segments).")
 
-            for i in range(len(path_networkx_ids)):
-                current_node_id = path_networkx_ids[i]
-                node_info = networkx_id_to_details[current_node_id]
-
-                print(f"Step {i+1}: Arrive at '{node_info['name']}' (Node ID: {node_info['qgis_id']}) at coordinates ({node_info['geometry'].x:.{COORD_PRECISION}f}, {node_info['geometry'].y:.{COORD_PRECISION}f}).")
-
+            # Collect the directions and write them out in one call instead of one print per line
+            direction_lines = []
+            edge_index, edge_descriptions = graph['edge_index'], graph['edge_descriptions']
+            for i, (current_node_id, node_info) in enumerate(zip(path_networkx_ids, path_details)):
+                direction_lines.append(f"Step {i+1}: Arrive at '{node_info['name']}' (Node ID: {node_info['qgis_id']}) at coordinates ({node_info['geometry'].x:.{COORD_PRECISION}f}, {node_info['geometry'].y:.{COORD_PRECISION}f}).")
 
                 if i < len(path_networkx_ids) - 1:
                     next_node_id = path_networkx_ids[i+1]
-                    if graph.has_edge(current_node_id, next_node_id):
-                        edge_data = graph.get_edge_data(current_node_id, next_node_id)
-                        line_description = edge_data.get('description', 'an unnamed path')
-                        print(f"    - From here, proceed along '{line_description}' towards the next location.")
+                    # One lookup both checks the edge exists and finds its description
+                    edge_position = edge_index.get((min(current_node_id, next_node_id), max(current_node_id, next_node_id)))
+                    if edge_position is not None:
+                        line_description = edge_descriptions[edge_position]
+                        direction_lines.append(f"    - From here, proceed along '{line_description}' towards the next location.")
                     else:
-                        print(f"    - WARNING: No direct road description found between '{node_info['name']}' and '{networkx_id_to_details[next_node_id]['name']}'.")
+                        direction_lines.append(f"    - WARNING: No direct road description found between '{node_info['name']}' and '{path_details[i+1]['name']}'.")
+            sys.stdout.write("\n".join(direction_lines) + "\n")
             print("\nJourney complete!")
 
         else:
@@ -258,95 +802,116 @@ def find_and_print_path(graph, start_id_str, end_id_str, search_type, networkx_i
 
 # --- Main Execution Block ---
 if __name__ == "__main__":
-    # Load Data
-    road_lines_gdf, road_intersections_gdf, main_buildings_gdf = load_geospatial_data(
-        ROAD_LINES_FILE, ROAD_INTERSECTIONS_FILE, MAIN_BUILDINGS_FILE
+    graph = None
+
+    # Reuse the graph built by an earlier run if the source files and settings are unchanged
+    cache_key = graph_cache_key(
+        [ROAD_LINES_FILE, ROAD_INTERSECTIONS_FILE, MAIN_BUILDINGS_FILE],
+        QGIS_NAME_COLUMN, QGIS_UNIQUE_ID_COLUMN, COORD_PRECISION, GRAPH_CACHE_VERSION
     )
+    cached_graph = load_graph_cache(GRAPH_CACHE_FILE, cache_key)
 
-    if road_lines_gdf is None or road_intersections_gdf is None or main_buildings_gdf is None:
-        print("Exiting due to data loading errors.")
+    if cached_graph is not None:
+        print(f"Loaded prepared graph from cache '{GRAPH_CACHE_FILE}' (source files unchanged).")
+        graph, networkx_id_to_details, id_index, name_index, data_summary = cached_graph
     else:
-        # Prepare Nodes
-        node_coords_to_networkx_id, networkx_id_to_details = prepare_graph_nodes(
-            road_intersections_gdf, main_buildings_gdf, QGIS_NAME_COLUMN, QGIS_UNIQUE_ID_COLUMN, COORD_PRECISION
+        # Load Data
+        road_lines_gdf, road_intersections_gdf, main_buildings_gdf = load_geospatial_data(
+            ROAD_LINES_FILE, ROAD_INTERSECTIONS_FILE, MAIN_BUILDINGS_FILE, QGIS_NAME_COLUMN, QGIS_UNIQUE_ID_COLUMN, READ_CHUNK_SIZE
         )
 
-        if not node_coords_to_networkx_id: # Check if mappings are empty
-            print("Exiting due to no nodes being prepared.")
+        if road_lines_gdf is None or road_intersections_gdf is None or main_buildings_gdf is None:
+            print("Exiting due to data loading errors.")
         else:
-            # Build Graph
-            G = build_network_graph(road_lines_gdf, node_coords_to_networkx_id, COORD_PRECISION)
+            # Prepare Nodes
+            networkx_id_to_details, id_index, name_index, layer_sizes = prepare_graph_nodes(
+                road_intersections_gdf, main_buildings_gdf, QGIS_NAME_COLUMN, QGIS_UNIQUE_ID_COLUMN, COORD_PRECISION
+            )
+
+            if not networkx_id_to_details: # Check if mappings are empty
+                print("Exiting due to no nodes being prepared.")
+            else:
+                # Build Graph
+                graph = build_network_graph(road_lines_gdf, networkx_id_to_details, COORD_PRECISION)
+
+                # Build the CSR adjacency now so it is saved with the cached graph
+                get_csr_adjacency(graph)
+
+                data_summary = {
+                    'road_intersections': layer_sizes[0],
+                    'main_buildings': layer_sizes[1],
+                    'unique_nodes': len(networkx_id_to_details),
+                }
+                save_graph_cache(GRAPH_CACHE_FILE, cache_key, (graph, networkx_id_to_details, id_index, name_index, data_summary))
+
+    if graph is not None:
+        # --- Data Summary ---
+        print("\n--- Processed Data Summary ---")
+        print(f"Initial road intersections loaded: {data_summary['road_intersections']}")
+        print(f"Initial main buildings loaded: {data_summary['main_buildings']}")
+        print(f"Total unique potential nodes identified: {data_summary['unique_nodes']}")
+        print(f"Road graph created with {graph['num_nodes']} nodes and {len(graph['edge_index'])} edges.")
+        print("------------------------------")
+        # --- End Data Summary ---
+
+        # --- Interactive Pathfinding Loop ---
+        while True:
+            print("\n--- Find Shortest Path ---")
             
-            # Store CRS in graph for later use
-            G.graph['crs'] = road_lines_gdf.crs # Assume road_lines_gdf has the desired CRS now
-
-            # --- Data Summary ---
-            print("\n--- Processed Data Summary ---")
-            print(f"Initial road intersections loaded: {len(road_intersections_gdf)}")
-            print(f"Initial main buildings loaded: {len(main_buildings_gdf)}")
-            print(f"Total unique potential nodes identified: {len(node_coords_to_networkx_id)}")
-            print(f"NetworkX Graph created with {G.number_of_nodes()} nodes and {G.number_of_edges()} edges.")
-            print("------------------------------")
-            # --- End Data Summary ---
-
-            # --- Interactive Pathfinding Loop ---
-            while True:
-                print("\n--- Find Shortest Path ---")
-                
-                # MODIFIED LINE: Changed "qgis_id" to "id" in the prompt
-                user_input_for_search_type = input("Search by 'id' (case-sensitive) or 'name' (case-insensitive)? (default: id): ").strip().lower()
-                
-                # Internal mapping for search_by type
-                if user_input_for_search_type == '' or user_input_for_search_type == 'id':
-                    SEARCH_BY_TYPE = 'id' # User sees 'id', and this is passed directly
-                elif user_input_for_search_type == 'name':
-                    SEARCH_BY_TYPE = 'name'
-                else:
-                    print("Invalid input. Searching by ID by default.")
-                    SEARCH_BY_TYPE = 'id' # Default to 'id' for user display and internal logic
-
-                start_networkx_id = None
-                end_networkx_id = None
-
-                # Input loop for Start Node
-                while start_networkx_id is None:
-                    # The prompt now uses the user-friendly SEARCH_BY_TYPE
-                    START_IDENTIFIER = input(f"Enter the {SEARCH_BY_TYPE.upper()} of the START node (or type 'exit' to quit): ").strip()
-                    if START_IDENTIFIER.lower() == 'exit':
-                        break # Exit the inner loop
-
-                    # Pass SEARCH_BY_TYPE directly to find_networkx_id.
-                    # find_networkx_id will now directly handle 'id' or 'name'.
-                    start_networkx_id = find_networkx_id(START_IDENTIFIER, networkx_id_to_details, SEARCH_BY_TYPE)
-                    if start_networkx_id is None:
-                        print(f"Error: Start node '{START_IDENTIFIER}' not found. Please try again with a valid {SEARCH_BY_TYPE.upper()}.")
-                
-                if start_networkx_id is None: # If user typed 'exit' for start node
-                    print("Exiting pathfinding session.")
-                    break # Exit the main while True loop
-
-                # Input loop for End Node
-                while end_networkx_id is None:
-                    # The prompt now uses the user-friendly SEARCH_BY_TYPE
-                    END_IDENTIFIER = input(f"Enter the {SEARCH_BY_TYPE.upper()} of the END node (or type 'exit' to quit): ").strip()
-                    if END_IDENTIFIER.lower() == 'exit':
-                        break # Exit the inner loop
-
-                    # Pass SEARCH_BY_TYPE directly to find_networkx_id
-                    end_networkx_id = find_networkx_id(END_IDENTIFIER, networkx_id_to_details, SEARCH_BY_TYPE)
-                    if end_networkx_id is None:
-                        print(f"Error: End node '{END_IDENTIFIER}' not found. Please try again with a valid {SEARCH_BY_TYPE.upper()}.")
-
-                if end_networkx_id is None: # If user typed 'exit' for end node
-                    print("Exiting pathfinding session.")
-                    break # Exit the main while True loop
-
-                # Proceed to find and print path if both nodes are found
-                # Pass SEARCH_BY_TYPE directly
-                find_and_print_path(G, START_IDENTIFIER, END_IDENTIFIER, SEARCH_BY_TYPE, networkx_id_to_details)
-
-                # Option to find another path or exit
-                another_path = input("\nDo you want to find another path? (yes/no): ").strip().lower()
-                if another_path != 'yes':
-                    print("Exiting pathfinding session. Goodbye!")
-                    break
+            # MODIFIED LINE: Changed "qgis_id" to "id" in the prompt
+            user_input_for_search_type = input("Search by 'id' (case-sensitive) or 'name' (case-insensitive)? (default: id): ").strip().lower()
+            
+            # Internal mapping for search_by type
+            if user_input_for_search_type == '' or user_input_for_search_type == 'id':
+                SEARCH_BY_TYPE = 'id' # User sees 'id', and this is passed directly
+            elif user_input_for_search_type == 'name':
+                SEARCH_BY_TYPE = 'name'
+            else:
+                print("Invalid input. Searching by ID by default.")
+                SEARCH_BY_TYPE = 'id' # Default to 'id' for user display and internal logic
+
+            start_networkx_id = None
+            end_networkx_id = None
+
+            # Input loop for Start Node
+            while start_networkx_id is None:
+                # The prompt now uses the user-friendly SEARCH_BY_TYPE
+                START_IDENTIFIER = input(f"Enter the {SEARCH_BY_TYPE.upper()} of the START node (or type 'exit' to quit): ").strip()
+                if START_IDENTIFIER.lower() == 'exit':
+                    break # Exit the inner loop
+
+                # Pass SEARCH_BY_TYPE directly to find_networkx_id.
+                # find_networkx_id will now directly handle 'id' or 'name'.
+                start_networkx_id = find_networkx_id(START_IDENTIFIER, id_index, name_index, SEARCH_BY_TYPE)
+                if start_networkx_id is None:
+                    print(f"Error: Start node '{START_IDENTIFIER}' not found. Please try again with a valid {SEARCH_BY_TYPE.upper()}.")
+            
+            if start_networkx_id is None: # If user typed 'exit' for start node
+                print("Exiting pathfinding session.")
+                break # Exit the main while True loop
+
+            # Input loop for End Node
+            while end_networkx_id is None:
+                # The prompt now uses the user-friendly SEARCH_BY_TYPE
+                END_IDENTIFIER = input(f"Enter the {SEARCH_BY_TYPE.upper()} of the END node (or type 'exit' to quit): ").strip()
+                if END_IDENTIFIER.lower() == 'exit':
+                    break # Exit the inner loop
+
+                # Pass SEARCH_BY_TYPE directly to find_networkx_id
+                end_networkx_id = find_networkx_id(END_IDENTIFIER, id_index, name_index, SEARCH_BY_TYPE)
+                if end_networkx_id is None:
+                    print(f"Error: End node '{END_IDENTIFIER}' not found. Please try again with a valid {SEARCH_BY_TYPE.upper()}.")
+
+            if end_networkx_id is None: # If user typed 'exit' for end node
+                print("Exiting pathfinding session.")
+                break # Exit the main while True loop
+
+            # Proceed to find and print path if both nodes are found
+            # Pass the already-resolved NetworkX IDs so they are not looked up again
+            find_and_print_path(graph, start_networkx_id, end_networkx_id, networkx_id_to_details)
+
+            # Option to find another path or exit
+            another_path = input("\nDo you want to find another path? (yes/no): ").strip().lower()
+            if another_path != 'yes':
+                print("Exiting pathfinding session. Goodbye!")
+                break